@@ -84,6 +84,25 @@ SSE_STREAM_TIMEOUT = _get_int_env("CATLOADER_SSE_TIMEOUT", 600)  # 10 minutes
 # - Env: CATLOADER_YTDLP_SOCKET_TIMEOUT
 YTDLP_SOCKET_TIMEOUT = _get_int_env("CATLOADER_YTDLP_SOCKET_TIMEOUT", 30)
 
+# Parallel fragment downloads per yt-dlp download (HLS/DASH formats)
+# - Fragmented formats are otherwise fetched one segment at a time, paying a
+#   full request round-trip per fragment
+# - Multiplies with MAX_CONCURRENT_OPERATIONS in the worst case (threads and
+#   connections per download); set to 1 for serial fragment downloads
+# - Env: CATLOADER_YTDLP_CONCURRENT_FRAGMENTS
+YTDLP_CONCURRENT_FRAGMENTS = _get_int_env("CATLOADER_YTDLP_CONCURRENT_FRAGMENTS", 4)
+
+# Connections per progressive (non-fragmented) HTTP download via aria2c
+# - 0 or 1 keeps yt-dlp's built-in single-connection downloader (default)
+# - >1 hands plain HTTP downloads to aria2c with that many range requests;
+#   only takes effect when the aria2c binary is on PATH
+# - HLS/DASH keep the native downloader (see YTDLP_CONCURRENT_FRAGMENTS)
+# - Only used by /api/download: aria2c reports no progress until the transfer
+#   ends, so it could neither drive the SSE progress stream nor be cancelled
+#   when that stream's client disconnects
+# - Env: CATLOADER_YTDLP_ARIA2C_CONNECTIONS
+YTDLP_ARIA2C_CONNECTIONS = _get_int_env("CATLOADER_YTDLP_ARIA2C_CONNECTIONS", 0)
+
 # =============================================================================
 # Thread Pool Configuration
 # =============================================================================
@@ -130,6 +149,13 @@ RETRY_MAX_DELAY = _get_float_env("CATLOADER_RETRY_MAX_DELAY", 10.0)
 # - Env: CATLOADER_MAX_FILE_SIZE
 MAX_FILE_SIZE = _get_int_env("CATLOADER_MAX_FILE_SIZE", 2 * 1024 * 1024 * 1024)  # 2GB
 
+# Minimum free space on the temp filesystem to start a new download (bytes)
+# - Downloads are refused with HTTP 503 below this, so concurrent large
+#   downloads can't fill the disk for everyone (running ones are unaffected)
+# - Set to 0 to disable the check
+# - Env: CATLOADER_MIN_FREE_TEMP_SPACE
+MIN_FREE_TEMP_SPACE = _get_int_env("CATLOADER_MIN_FREE_TEMP_SPACE", 512 * 1024 * 1024)  # 512MB
+
 # Maximum URL length allowed (characters)
 # - Prevents memory exhaustion from crafted long URLs
 # - Most browsers limit URLs to 2048-8192 characters
@@ -145,22 +171,44 @@ MAX_URL_LENGTH = _get_int_env("CATLOADER_MAX_URL_LENGTH", 2048)
 DOWNLOAD_EXPIRY_SECONDS = _get_int_env("CATLOADER_DOWNLOAD_EXPIRY", 300)  # 5 minutes
 
 # Maximum completed downloads to keep in memory
-# - When limit is reached, oldest downloads are evicted
+# - Limit on the whole store (not per shard); once it is reached, storing a
+#   new download evicts the oldest one
 # - Env: CATLOADER_MAX_DOWNLOADS
 MAX_COMPLETED_DOWNLOADS = _get_int_env("CATLOADER_MAX_DOWNLOADS", 100)
 
 # Chunk size for streaming file downloads (bytes)
+# - Each chunk is one read and one ASGI send (a thread-pool hop for
+#   FileResponse), so large multiples of the 4 KiB page size keep per-chunk
+#   overhead low for multi-hundred-MB videos
+# - Costs this much memory per in-flight download
 # - Env: CATLOADER_CHUNK_SIZE
-CHUNK_SIZE = _get_int_env("CATLOADER_CHUNK_SIZE", 8192)
+CHUNK_SIZE = _get_int_env("CATLOADER_CHUNK_SIZE", 1024 * 1024)  # 1 MiB
 
 # Age threshold for cleaning orphaned temp directories (seconds)
 # - Directories older than this are considered abandoned and cleaned up
 # - Env: CATLOADER_ORPHAN_CLEANUP_AGE
 ORPHAN_CLEANUP_AGE_SECONDS = _get_int_env("CATLOADER_ORPHAN_CLEANUP_AGE", 3600)  # 1 hour
 
+# Worker threads used to remove temp directories during a cleanup sweep
+# - Each rmtree is I/O-bound, so a few workers overlap the unlink latency
+# - Set to 1 to remove directories sequentially
+# - Env: CATLOADER_CLEANUP_WORKERS
+CLEANUP_WORKERS = _get_int_env("CATLOADER_CLEANUP_WORKERS", 4)
+
 # Prefix for temporary directories (used to identify orphans)
 TEMP_DIR_PREFIX = "catloader_"
 
+# Parent directory for per-download temp directories
+# - Every download is written here in full before it is streamed out and
+#   deleted; pointing this at a tmpfs (e.g. /dev/shm or a mounted tmpfs
+#   volume) avoids a disk write and read-back per download
+# - A tmpfs counts against RAM: size it for MAX_CONCURRENT_OPERATIONS times
+#   the largest expected file, and keep MIN_FREE_TEMP_SPACE set so downloads
+#   are refused before it fills up
+# - Unset uses the system temp directory (TMPDIR, usually /tmp)
+# - Env: CATLOADER_TEMP_DIR
+TEMP_BASE_DIR = os.environ.get("CATLOADER_TEMP_DIR") or None
+
 # User-Agent for yt-dlp HTTP requests
 # - Some sites block requests without a browser-like User-Agent
 # - Update periodically to match current browser versions
@@ -171,12 +219,59 @@ YTDLP_USER_AGENT = os.environ.get(
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 )
 
+# Directory for yt-dlp's on-disk cache (YouTube player/signature data)
+# - Reused across requests and restarts so the player JS isn't re-fetched and
+#   re-parsed on every extraction
+# - Unset keeps yt-dlp's default (~/.cache/yt-dlp or $XDG_CACHE_HOME/yt-dlp);
+#   point it at a persistent volume when the home directory is ephemeral
+# - Env: CATLOADER_YTDLP_CACHE_DIR
+YTDLP_CACHE_DIR = os.environ.get("CATLOADER_YTDLP_CACHE_DIR") or None
+
 # Interval between SSE progress updates (seconds)
 # - Lower values give more responsive UI but increase server load
 # - Higher values reduce load but make progress appear to update in chunks
 # - Env: CATLOADER_PROGRESS_POLL_INTERVAL
 PROGRESS_POLL_INTERVAL = _get_float_env("CATLOADER_PROGRESS_POLL_INTERVAL", 0.5)
 
+# Minimum interval between 'downloading' progress events (seconds)
+# - yt-dlp calls its progress hook many times per second on fast connections;
+#   updates arriving sooner than this after the last one are dropped
+# - The final update of each stream (100%) is always sent
+# - Set to 0 to forward every hook call
+# - Env: CATLOADER_PROGRESS_MIN_INTERVAL
+PROGRESS_MIN_INTERVAL = _get_float_env("CATLOADER_PROGRESS_MIN_INTERVAL", 0.1)
+
+# How long extracted video info is cached per URL (seconds)
+# - Repeated /api/info lookups for the same URL within this window skip yt-dlp
+# - Concurrent lookups for the same URL share a single extraction
+# - Set to 0 to disable caching
+# - Env: CATLOADER_INFO_CACHE_TTL
+INFO_CACHE_TTL_SECONDS = _get_float_env("CATLOADER_INFO_CACHE_TTL", 60.0)
+
+# Maximum number of URLs kept in the video info cache (least recently used evicted)
+# - Env: CATLOADER_INFO_CACHE_SIZE
+INFO_CACHE_MAX_ENTRIES = _get_int_env("CATLOADER_INFO_CACHE_SIZE", 512)
+
+# Maximum number of raw yt-dlp info dicts kept for reuse by downloads
+# - A download of a URL whose info was just fetched (the usual UI flow) reuses
+#   the extracted metadata instead of repeating the page/player requests
+# - Raw info dicts are large (often hundreds of KB), hence the small default
+# - Entries share INFO_CACHE_TTL_SECONDS; set to 0 to disable reuse
+# - Env: CATLOADER_INFO_CACHE_RAW_SIZE
+INFO_CACHE_RAW_MAX_ENTRIES = _get_int_env("CATLOADER_INFO_CACHE_RAW_SIZE", 32)
+
+# Output codec for audio-only downloads
+# - best (default): keep the source codec (usually AAC -> .m4a or Opus ->
+#   .opus), a container rewrite with no re-encode
+# - m4a / opus / mp3: prefer a source already in that codec (copied, not
+#   re-encoded) and convert otherwise; MP3 is encoded at 320 kbps, which is
+#   CPU-bound and scales with the track length, but plays everywhere
+# - Unknown values fall back to best
+# - Env: CATLOADER_AUDIO_FORMAT
+AUDIO_FORMAT = os.environ.get("CATLOADER_AUDIO_FORMAT", "best").lower()
+if AUDIO_FORMAT not in ("mp3", "best", "m4a", "opus"):
+    AUDIO_FORMAT = "best"
+
 # =============================================================================
 # Metrics Configuration
 # =============================================================================
@@ -1,12 +1,12 @@
 import os
 import shutil
 import logging
-import tempfile
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import yt_dlp
 from .routes import download
+from .services.downloader import get_temp_root
 from .utils import metrics
 from .models.schemas import HealthResponse, HealthDetailedResponse
 
@@ -106,8 +106,9 @@ async def health_detailed():
     # Thread pool status (using public API to avoid coupling)
     thread_pool_status = download.get_executor_stats()
 
-    # Disk space for temp directory
-    temp_dir = tempfile.gettempdir()
+    # Disk space for the download temp directory (CATLOADER_TEMP_DIR or the
+    # system temp directory)
+    temp_dir = get_temp_root()
     try:
         disk_usage = shutil.disk_usage(temp_dir)
         # Guard against division by zero (possible on some virtual filesystems)
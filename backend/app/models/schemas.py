@@ -47,6 +47,12 @@ class ThreadPoolStatus(BaseModel):
     """Thread pool executor status."""
     max_workers: Optional[int] = None
     active_threads: Optional[int] = None
+    max_concurrent_operations: Optional[int] = None
+    tasks_total: Optional[int] = None  # Submitted since startup
+    tasks_running: Optional[int] = None
+    tasks_queued: Optional[int] = None  # Submitted but not yet started
+    tasks_completed: Optional[int] = None
+    queue_depth: Optional[int] = None  # Executor work queue size
     status: Optional[str] = None  # "monitoring unavailable" fallback
 
 
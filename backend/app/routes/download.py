@@ -5,13 +5,13 @@ import os
 import threading
 import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import partial
 from urllib.parse import quote
-from typing import TypeVar, Callable, Tuple, Optional
+from typing import AsyncIterator, TypeVar, Callable, Tuple, Optional
 
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
 
 from ..config import (
     INFO_EXTRACTION_TIMEOUT,
@@ -29,6 +29,9 @@ from ..services.downloader import (
     download_video_with_progress,
     remove_completed_download,
     cleanup_temp_dir,
+    defer_cleanup,
+    get_extension,
+    has_free_temp_space,
     validate_content_type,
 )
 from ..utils import metrics, sanitize_for_log, sanitize_error_for_user
@@ -37,46 +40,54 @@ from ..validation import validate_url as config_validate_url, validate_format_id
 logger = logging.getLogger(__name__)
 
 
+T = TypeVar('T')
+
+
 # =============================================================================
 # Helper Classes
 # =============================================================================
 
 class SemaphoreGuardedIterator:
     """
-    Wrapper that guarantees semaphore release when iteration ends.
+    Async iterator wrapper that guarantees semaphore release when iteration ends.
 
     This solves a race condition where if a client disconnects before the
     generator starts iterating, the generator's finally block never executes.
-    This wrapper ensures release() is called when close() is invoked by
-    Starlette, even if iteration never started.
+    This wrapper releases on exhaustion, on any error or cancellation raised
+    while iterating, on aclose(), and as a last resort when it is garbage
+    collected (Starlette does not close body iterators on disconnect).
 
-    Thread-safety: Uses a lock to prevent double-release if close() is called
-    from a different thread than __next__() (possible with Starlette's streaming).
+    Thread-safety: Uses a lock to prevent double-release, since the semaphore
+    is shared with executor done callbacks running in worker threads.
     """
 
-    def __init__(self, generator, semaphore: threading.Semaphore):
+    def __init__(self, generator: AsyncIterator[T], semaphore: threading.Semaphore):
         self._generator = generator
         self._semaphore = semaphore
         self._released = False
         self._lock = threading.Lock()
 
-    def __iter__(self):
+    def __aiter__(self) -> "SemaphoreGuardedIterator":
         return self
 
-    def __next__(self):
+    async def __anext__(self) -> T:
         try:
-            return next(self._generator)
-        except StopIteration:
+            return await self._generator.__anext__()
+        except BaseException:
+            # StopAsyncIteration, errors, and cancellation (client disconnect)
             self._release()
             raise
 
-    def close(self):
-        """Called by Starlette when response ends or client disconnects."""
+    async def aclose(self) -> None:
+        """Release the semaphore and close the wrapped generator."""
         self._release()
-        if hasattr(self._generator, 'close'):
-            self._generator.close()
+        if hasattr(self._generator, 'aclose'):
+            await self._generator.aclose()
 
-    def _release(self):
+    def __del__(self) -> None:
+        self._release()
+
+    def _release(self) -> None:
         """Thread-safe semaphore release (prevents double-release)."""
         with self._lock:
             if not self._released:
@@ -84,12 +95,162 @@ class SemaphoreGuardedIterator:
                 self._semaphore.release()
 
 
+class ServerAtCapacityError(Exception):
+    """Raised when the server cannot accept more concurrent operations."""
+    pass
+
+
+class BoundedExecutor:
+    """
+    ThreadPoolExecutor wrapper that bounds the number of in-flight operations.
+
+    A slot is acquired (non-blocking) on submit and released by a done
+    callback when the future completes. This gives a single capacity signal
+    for every submitter and keeps the executor's internal work queue from
+    growing without bound.
+
+    Because the slot is tied to the future rather than to the awaiting
+    coroutine, a slot held by an orphaned thread (after an asyncio timeout)
+    is only released once yt-dlp's socket_timeout lets that thread finish.
+
+    Slots can also be acquired directly via acquire_slot() for work that runs
+    outside the executor (e.g. the SSE progress stream's download thread).
+
+    Submitted work is counted so saturation is visible before timeouts occur:
+    total (submitted), running, completed, and queued (submitted but not yet
+    started).
+    """
+
+    def __init__(self, max_workers: int, bound: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._semaphore = threading.BoundedSemaphore(bound)
+        self._bound = bound
+        # Task counters, protected by _counter_lock
+        self._counter_lock = threading.Lock()
+        self._submitted = 0
+        self._running = 0
+        self._completed = 0
+
+    @property
+    def bound(self) -> int:
+        """Maximum number of concurrent operations."""
+        return self._bound
+
+    @property
+    def semaphore(self) -> threading.BoundedSemaphore:
+        """Underlying slot semaphore (for SemaphoreGuardedIterator)."""
+        return self._semaphore
+
+    def acquire_slot(self) -> None:
+        """
+        Acquire a capacity slot without blocking.
+
+        Raises:
+            ServerAtCapacityError: If all slots are in use
+        """
+        if not self._semaphore.acquire(blocking=False):
+            raise ServerAtCapacityError(
+                f"Server at capacity ({self._bound} concurrent operations). "
+                "Please try again later."
+            )
+
+    def release_slot(self) -> None:
+        """Release a slot previously acquired with acquire_slot()."""
+        self._semaphore.release()
+
+    def submit(self, func: Callable[..., T], *args) -> "Future[T]":
+        """
+        Submit a callable, holding a slot until the returned future is done.
+
+        Raises:
+            ServerAtCapacityError: If all slots are in use
+        """
+        self.acquire_slot()
+        try:
+            future = self._executor.submit(self._run_counted, func, *args)
+        except BaseException:
+            self.release_slot()
+            raise
+        with self._counter_lock:
+            self._submitted += 1
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _run_counted(self, func: Callable[..., T], *args) -> T:
+        """Run func in a worker thread, counting it as running."""
+        with self._counter_lock:
+            self._running += 1
+        return func(*args)
+
+    def _on_done(self, future: Future) -> None:
+        """Done callback: update counters and release the slot."""
+        with self._counter_lock:
+            self._completed += 1
+            # A future that finished without being cancelled has started running
+            if not future.cancelled():
+                self._running -= 1
+        self.release_slot()
+
+    def submit_async(self, func: Callable[..., T], *args) -> "asyncio.Future[T]":
+        """Submit a callable and return an awaitable bound to the running loop."""
+        return asyncio.wrap_future(self.submit(func, *args))
+
+    def stats(self) -> dict:
+        """
+        Executor statistics (see get_executor_stats for caveats).
+
+        Raises:
+            AttributeError: If ThreadPoolExecutor's private attributes change
+        """
+        with self._counter_lock:
+            submitted = self._submitted
+            running = self._running
+            completed = self._completed
+        return {
+            "max_workers": self._executor._max_workers,
+            "active_threads": len(self._executor._threads),
+            "max_concurrent_operations": self._bound,
+            "tasks_total": submitted,
+            "tasks_running": running,
+            "tasks_queued": max(submitted - running - completed, 0),
+            "tasks_completed": completed,
+            "queue_depth": self._executor._work_queue.qsize(),
+        }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Shutdown the underlying executor."""
+        self._executor.shutdown(wait=wait)
+
+
+class TempDirFileResponse(FileResponse):
+    """
+    FileResponse that removes the download's temp files once it is done.
+
+    Starlette skips a response's background task when sending fails (e.g. the
+    client disconnects mid-transfer), so cleanup is scheduled from a finally
+    block instead and is guaranteed for every outcome. It runs on the
+    background cleanup thread, so the request finishes (and a keep-alive
+    connection is free again) without waiting on rmtree.
+    """
+
+    # Read/send granularity (Starlette's default is 64 KiB)
+    chunk_size = CHUNK_SIZE
+
+    def __init__(self, path: str, cleanup: Callable[[], None], **kwargs):
+        super().__init__(path, **kwargs)
+        self._cleanup = cleanup
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            defer_cleanup(self._cleanup)
+
+
 # =============================================================================
 # Helper Functions
 # =============================================================================
 
-T = TypeVar('T')
-
 # Maximum length for error messages in metrics (prevents log bloat)
 _METRICS_ERROR_MAX_LENGTH = 100
 
@@ -137,6 +298,17 @@ _WINDOWS_RESERVED_NAMES = frozenset([
     'LPT1', 'LPT2', 'LPT3', 'LPT4', 'LPT5', 'LPT6', 'LPT7', 'LPT8', 'LPT9',
 ])
 
+# Single-pass translation table for sanitize_filename:
+# - Control characters (ASCII 0-31, including \n, \r and null) are removed
+# - Quotes break header parsing, so they become single quotes
+# - Path separators (Unix and Windows) become underscores
+_FILENAME_TRANSLATION = {cp: None for cp in range(32)}
+_FILENAME_TRANSLATION.update({
+    ord('"'): "'",
+    ord('/'): '_',
+    ord('\\'): '_',
+})
+
 
 def sanitize_filename(filename: str) -> Tuple[str, str]:
     """
@@ -173,18 +345,8 @@ def sanitize_filename(filename: str) -> Tuple[str, str]:
     Usage in Content-Disposition header:
         Content-Disposition: attachment; filename="video.mp4"; filename*=UTF-8''video.mp4
     """
-    # Remove null bytes and control characters (ASCII 0-31)
-    safe_filename = ''.join(c for c in filename if ord(c) >= 32)
-
-    # Remove/replace problematic characters for headers and filesystems
-    safe_filename = (safe_filename
-        .replace('"', "'")      # Quotes break header parsing
-        .replace('\n', '')      # Newlines break headers
-        .replace('\r', '')      # Carriage returns break headers
-        .replace('/', '_')      # Path separator (Unix)
-        .replace('\\', '_')     # Path separator (Windows)
-        .replace('\x00', '')    # Null byte (redundant but explicit)
-    )
+    # Remove control characters and replace quotes/path separators in one pass
+    safe_filename = filename.translate(_FILENAME_TRANSLATION)
 
     # Remove leading/trailing dots and spaces (problematic on Windows)
     safe_filename = safe_filename.strip('. ')
@@ -194,47 +356,66 @@ def sanitize_filename(filename: str) -> Tuple[str, str]:
     if name_without_ext.upper() in _WINDOWS_RESERVED_NAMES:
         safe_filename = '_' + safe_filename
 
-    # Encode for ASCII fallback
-    ascii_filename = safe_filename.encode('ascii', 'ignore').decode('ascii')
+    # Encode for ASCII fallback (most filenames are already ASCII)
+    if safe_filename.isascii():
+        ascii_filename = safe_filename
+    else:
+        ascii_filename = safe_filename.encode('ascii', 'ignore').decode('ascii')
     # URL-encode for UTF-8 filename*
     encoded_filename = quote(safe_filename)
     return ascii_filename, encoded_filename
 
-router = APIRouter(prefix="/api", tags=["download"])
 
-# Thread pool for blocking operations
-# Note: Using more workers to handle orphaned threads from timeouts
-_executor = ThreadPoolExecutor(max_workers=THREAD_POOL_MAX_WORKERS)
+def _resolve_within_directory(file_path: str, directory: str) -> Optional[str]:
+    """
+    Resolve file_path and check it lies strictly inside directory.
 
-# Semaphore to limit concurrent yt-dlp operations
-# This prevents thread pool exhaustion when many timeouts occur
-# (orphaned threads from timeouts continue running until yt-dlp's socket_timeout)
-#
-# NOTE: We use threading.Semaphore (not asyncio.Semaphore) because the semaphore
-# may be released from a synchronous context (SemaphoreGuardedIterator) running
-# in a different thread than the event loop. threading.Semaphore is thread-safe
-# and can be safely acquired/released from any thread.
-_operations_semaphore: Optional[threading.Semaphore] = None
-_semaphore_init_lock = threading.Lock()
+    Only file_path is passed through realpath on the happy path. If resolving
+    it changed nothing beyond normalization, the path contains no symlinks, so
+    a normalized directory is a valid comparison base. Otherwise (e.g. /tmp is
+    a symlink on macOS) the directory is resolved as well.
 
-# Timeout for acquiring the semaphore (fail-fast when at capacity)
-_SEMAPHORE_ACQUIRE_TIMEOUT = 0.1
+    Args:
+        file_path: Path to validate
+        directory: Directory the file must be inside
 
+    Returns:
+        The resolved file path, or None if it escapes the directory.
 
-def _get_semaphore() -> threading.Semaphore:
+    Raises:
+        OSError: If the path cannot be resolved
     """
-    Get or create the operations semaphore (thread-safe lazy initialization).
+    real_file_path = os.path.realpath(file_path)
+    base_dir = os.path.normpath(os.path.abspath(directory))
+    if real_file_path != os.path.normpath(os.path.abspath(file_path)):
+        base_dir = os.path.realpath(directory)
+
+    try:
+        common = os.path.commonpath([real_file_path, base_dir])
+    except ValueError:
+        # Mixed absolute/relative paths or different drives (Windows)
+        return None
+    if common != base_dir or real_file_path == base_dir:
+        return None
+    return real_file_path
 
-    Uses double-checked locking pattern for efficiency: the lock is only
-    acquired when the semaphore hasn't been created yet.
-    """
-    global _operations_semaphore
-    if _operations_semaphore is None:
-        with _semaphore_init_lock:
-            # Double-check after acquiring lock (another thread may have created it)
-            if _operations_semaphore is None:
-                _operations_semaphore = threading.Semaphore(MAX_CONCURRENT_OPERATIONS)
-    return _operations_semaphore
+
+router = APIRouter(prefix="/api", tags=["download"])
+
+# Bounded thread pool for blocking operations
+# Note: Using more workers than the bound to handle orphaned threads from timeouts
+#
+# The bound (MAX_CONCURRENT_OPERATIONS) limits concurrent yt-dlp operations.
+# This prevents thread pool exhaustion when many timeouts occur
+# (orphaned threads from timeouts continue running until yt-dlp's socket_timeout)
+#
+# NOTE: The slot semaphore is a threading.BoundedSemaphore (not asyncio.Semaphore)
+# because slots are released from done callbacks and from SemaphoreGuardedIterator,
+# both of which may run in a different thread than the event loop.
+_executor = BoundedExecutor(
+    max_workers=THREAD_POOL_MAX_WORKERS,
+    bound=MAX_CONCURRENT_OPERATIONS,
+)
 
 
 # =============================================================================
@@ -245,8 +426,11 @@ def get_executor_stats() -> dict:
     """
     Get thread pool executor statistics for monitoring.
 
+    Task counters (total/running/queued/completed) are tracked by
+    BoundedExecutor itself and reveal saturation before it causes timeouts.
+
     WARNING: This function accesses private attributes of ThreadPoolExecutor
-    (_max_workers, _threads) which are implementation details that may change
+    (_max_workers, _threads, _work_queue) which are implementation details that may change
     in future Python versions.
 
     Why we do this:
@@ -257,7 +441,6 @@ def get_executor_stats() -> dict:
     Tested on: Python 3.9, 3.10, 3.11, 3.12
 
     Alternatives considered:
-    - Custom executor wrapper: Adds complexity for minimal benefit
     - External monitoring (prometheus): Overkill for this use case
     - No monitoring: Reduces observability for debugging timeouts
 
@@ -265,10 +448,7 @@ def get_executor_stats() -> dict:
         Dictionary with executor stats, or error status if unavailable.
     """
     try:
-        return {
-            "max_workers": _executor._max_workers,
-            "active_threads": len(_executor._threads),
-        }
+        return _executor.stats()
     except AttributeError:
         # Fallback if private attributes change in future Python versions
         return {"status": "monitoring unavailable"}
@@ -284,16 +464,26 @@ def shutdown_executor(wait: bool = False) -> None:
     _executor.shutdown(wait=wait)
 
 
+def _ensure_temp_space() -> None:
+    """
+    Refuse a new download when the temp filesystem is nearly full.
+
+    Raises:
+        HTTPException: 503 if free space is below MIN_FREE_TEMP_SPACE.
+    """
+    if not has_free_temp_space():
+        logger.warning("Refusing download: temp filesystem is low on free space")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is low on disk space. Please try again later."
+        )
+
+
 def _generate_request_id() -> str:
     """Generate a short request ID for logging correlation."""
     return uuid.uuid4().hex[:8]
 
 
-class ServerAtCapacityError(Exception):
-    """Raised when the server cannot accept more concurrent operations."""
-    pass
-
-
 async def run_with_timeout(
     func: Callable[..., T],
     timeout: float,
@@ -303,8 +493,8 @@ async def run_with_timeout(
     """
     Run a blocking function with timeout handling and concurrency limiting.
 
-    Uses a semaphore to limit concurrent operations and prevent thread pool
-    exhaustion when many timeouts occur.
+    Submits through the BoundedExecutor, which limits concurrent operations
+    and prevents thread pool exhaustion when many timeouts occur.
 
     IMPORTANT: When timeout occurs, the underlying thread continues running until
     yt-dlp completes (limited by its socket_timeout). This is a known limitation
@@ -323,31 +513,18 @@ async def run_with_timeout(
         asyncio.TimeoutError: If the function doesn't complete within timeout
         ServerAtCapacityError: If max concurrent operations limit is reached
     """
-    # Prepare partial function before acquiring semaphore
-    # This ensures semaphore isn't held if partial() fails
+    # Prepare partial function before acquiring a slot
+    # This ensures a slot isn't held if partial() fails
     if kwargs:
         func = partial(func, **kwargs)
 
-    # Try to acquire semaphore with minimal wait
-    # If server is at capacity, fail fast instead of queueing
-    semaphore = _get_semaphore()
-    acquired = semaphore.acquire(blocking=True, timeout=_SEMAPHORE_ACQUIRE_TIMEOUT)
-    if not acquired:
-        raise ServerAtCapacityError(
-            f"Server at capacity ({MAX_CONCURRENT_OPERATIONS} concurrent operations). "
-            "Please try again later."
-        )
-
-    loop = asyncio.get_running_loop()
+    # Fail fast with ServerAtCapacityError instead of queueing when all slots
+    # are in use. The slot is released when the future completes, not when
+    # we stop awaiting it, so orphaned threads still count against capacity.
+    future = _executor.submit_async(func, *args)
 
     try:
-        # Run directly in our executor with timeout
-        # Using a single executor avoids the race condition of having
-        # future.result() block in a separate thread pool
-        return await asyncio.wait_for(
-            loop.run_in_executor(_executor, func, *args),
-            timeout=timeout
-        )
+        return await asyncio.wait_for(future, timeout=timeout)
     except asyncio.TimeoutError:
         # The thread continues running until yt-dlp's socket_timeout kicks in
         # We can't cancel it, but it will eventually terminate
@@ -356,8 +533,6 @@ async def run_with_timeout(
             f"internal timeout (orphaned thread)"
         )
         raise
-    finally:
-        semaphore.release()
 
 
 @router.post("/info", response_model=VideoInfo, responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 504: {"model": ErrorResponse}})
@@ -370,7 +545,8 @@ async def get_info(request: URLRequest):
 
     try:
         # Note: No retry at endpoint level to avoid multiplying timeout
-        # yt-dlp has internal retry logic (retries=3 in COMMON_OPTS)
+        # yt-dlp has internal retry logic (retries/fragment_retries/
+        # extractor_retries with exponential backoff, see COMMON_OPTS)
         info = await run_with_timeout(
             get_video_info,
             INFO_EXTRACTION_TIMEOUT,
@@ -431,13 +607,16 @@ async def download(
     validated_url = validate_url_for_http(url)
     validated_format_id = validate_format_id_for_http(format_id)
 
+    _ensure_temp_space()
+
     logger.info(f"[{request_id}] Starting download for: {sanitize_for_log(validated_url)} (format={validated_format_id}, audio_only={audio_only})")
 
-    file_stream = None
+    download_file = None
     try:
         # Note: No retry at endpoint level to avoid multiplying timeout
-        # yt-dlp has internal retry logic (retries=3 in COMMON_OPTS)
-        filename, content_type, file_size, file_stream = await run_with_timeout(
+        # yt-dlp has internal retry logic (retries/fragment_retries/
+        # extractor_retries with exponential backoff, see COMMON_OPTS)
+        filename, content_type, file_size, download_file = await run_with_timeout(
             download_video,
             DOWNLOAD_INIT_TIMEOUT,
             validated_url, validated_format_id, audio_only
@@ -449,20 +628,22 @@ async def download(
         # Sanitize filename for Content-Disposition header (RFC 5987)
         ascii_filename, encoded_filename = sanitize_filename(filename)
         if not ascii_filename:
-            ascii_filename = "download" + (".mp3" if audio_only else ".mp4")
+            ascii_filename = "download" + (get_extension(filename) or (".mp3" if audio_only else ".mp4"))
             encoded_filename = ascii_filename
 
-        # Transfer ownership of file_stream to StreamingResponse
-        # Set to None so we don't close it in the except block
-        response_stream = file_stream
-        file_stream = None
+        # Transfer ownership of download_file to the response
+        # Set to None so we don't close it in the finally block
+        response_file = download_file
+        download_file = None
 
-        return StreamingResponse(
-            response_stream,
+        # Serve from disk (zero-copy via http.response.pathsend when the
+        # server supports it); the response removes the temp dir when done
+        return TempDirFileResponse(
+            response_file.path,
+            cleanup=response_file.close,
             media_type=content_type,
             headers={
                 "Content-Disposition": f'attachment; filename="{ascii_filename}"; filename*=UTF-8\'\'{encoded_filename}',
-                "Content-Length": str(file_size),
                 "Cache-Control": "no-cache",
             }
         )
@@ -509,15 +690,18 @@ async def download(
         logger.exception(f"[{request_id}] Unexpected error after {elapsed:.2f}s: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
     finally:
-        # If file_stream was not transferred to StreamingResponse, consume it to trigger cleanup
-        if file_stream is not None:
+        # If download_file was not transferred to the response, close it to trigger cleanup
+        if download_file is not None:
             try:
-                # Consuming the generator triggers its finally block which cleans up temp files
-                for _ in file_stream:
-                    pass
+                download_file.close()
             except Exception as cleanup_error:
                 # Best effort cleanup - log but don't raise since we're already in error handling
-                logger.debug(f"Error during file stream cleanup: {cleanup_error}")
+                logger.debug(f"Error during download file cleanup: {cleanup_error}")
+
+
+# Constant SSE error events, serialized once at import
+_SSE_TIMEOUT_EVENT = f"data: {json.dumps({'status': 'error', 'error_type': 'timeout', 'message': 'Connection timeout', 'retryable': True})}\n\n"
+_SSE_INTERNAL_ERROR_EVENT = f"data: {json.dumps({'status': 'error', 'error_type': 'internal', 'message': 'Internal server error', 'retryable': False})}\n\n"
 
 
 @router.get("/download/progress")
@@ -528,33 +712,31 @@ async def download_progress(
 ):
     """Stream download progress via Server-Sent Events.
 
-    NOTE: This endpoint uses the same concurrency semaphore as other endpoints
+    NOTE: This endpoint acquires a slot from the same BoundedExecutor as other endpoints
     to prevent DoS attacks via many simultaneous SSE connections.
     """
     # Validate inputs
     validated_url = validate_url_for_http(url)
     validated_format_id = validate_format_id_for_http(format_id)
+    _ensure_temp_space()
 
-    # Acquire semaphore before starting the stream to prevent DoS
+    # Acquire an executor slot before starting the stream to prevent DoS
     # This limits how many simultaneous SSE connections can be active
-    semaphore = _get_semaphore()
-    acquired = semaphore.acquire(blocking=True, timeout=_SEMAPHORE_ACQUIRE_TIMEOUT)
-    if not acquired:
-        raise HTTPException(
-            status_code=503,
-            detail=f"Server at capacity ({MAX_CONCURRENT_OPERATIONS} concurrent operations). "
-                   "Please try again later."
-        )
+    try:
+        _executor.acquire_slot()
+    except ServerAtCapacityError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-    def event_generator():
+    async def event_generator():
         start_time = time.monotonic()
+        events = download_video_with_progress(validated_url, validated_format_id, audio_only)
         try:
-            for event in download_video_with_progress(validated_url, validated_format_id, audio_only):
+            async for event in events:
                 # Check if connection has exceeded maximum allowed time
                 elapsed = time.monotonic() - start_time
                 if elapsed > SSE_STREAM_TIMEOUT:
                     logger.warning(f"SSE stream timeout after {elapsed:.0f}s for {sanitize_for_log(validated_url)}")
-                    yield f"data: {json.dumps({'status': 'error', 'error_type': 'timeout', 'message': 'Connection timeout', 'retryable': True})}\n\n"
+                    yield _SSE_TIMEOUT_EVENT
                     return
                 yield event
         except FileSizeLimitError as e:
@@ -581,14 +763,17 @@ async def download_progress(
             elapsed = time.monotonic() - start_time
             logger.exception(f"Unexpected error in download progress stream: {e}")
             metrics.record_error(operation="download_progress", error=_truncate_error(str(e)), elapsed=elapsed)
-            yield f"data: {json.dumps({'status': 'error', 'error_type': 'internal', 'message': 'Internal server error', 'retryable': False})}\n\n"
-        # Note: Semaphore release is handled by SemaphoreGuardedIterator.close()
+            yield _SSE_INTERNAL_ERROR_EVENT
+        finally:
+            # Cancels the download if we stopped early (timeout or disconnect)
+            await events.aclose()
+        # Note: Semaphore release is handled by SemaphoreGuardedIterator
         # This guarantees release even if client disconnects before iteration starts
 
-    # Wrap generator to guarantee semaphore release on close()
+    # Wrap generator to guarantee semaphore release
     # This solves the race condition where client disconnect before iteration
     # would leak the semaphore (generator's finally never executes)
-    guarded_iterator = SemaphoreGuardedIterator(event_generator(), semaphore)
+    guarded_iterator = SemaphoreGuardedIterator(event_generator(), _executor.semaphore)
 
     return StreamingResponse(
         guarded_iterator,
@@ -631,18 +816,18 @@ async def download_file(download_id: str):
 
     # Validate file is within temp directory (prevent path traversal)
     try:
-        real_file_path = os.path.realpath(file_path)
-        real_temp_dir = os.path.realpath(temp_dir)
-        if not real_file_path.startswith(real_temp_dir + os.sep):
-            elapsed = time.monotonic() - start_time
-            logger.error(f"[{request_id}] Path traversal attempt after {elapsed:.2f}s: {file_path}")
-            cleanup_temp_dir(temp_dir)
-            raise HTTPException(status_code=400, detail="Invalid file path")
+        real_file_path = _resolve_within_directory(file_path, temp_dir)
+        file_stat = os.stat(real_file_path) if real_file_path is not None else None
     except OSError:
         elapsed = time.monotonic() - start_time
         logger.warning(f"[{request_id}] File not found after {elapsed:.2f}s")
         cleanup_temp_dir(temp_dir)
         raise HTTPException(status_code=404, detail="File not found")
+    if real_file_path is None:
+        elapsed = time.monotonic() - start_time
+        logger.error(f"[{request_id}] Path traversal attempt after {elapsed:.2f}s: {file_path}")
+        cleanup_temp_dir(temp_dir)
+        raise HTTPException(status_code=400, detail="Invalid file path")
 
     # Sanitize filename for header
     ascii_filename, encoded_filename = sanitize_filename(file_info.get('filename', 'download'))
@@ -654,33 +839,20 @@ async def download_file(download_id: str):
     file_size = file_info.get('file_size', 0)
     logger.info(f"[{request_id}] Streaming file in {elapsed:.2f}s: {ascii_filename} ({file_size} bytes)")
 
-    # Use validated real_file_path to prevent TOCTOU attacks via symlinks
-    validated_path = real_file_path
-
-    def file_generator():
-        try:
-            with open(validated_path, 'rb') as f:
-                while chunk := f.read(CHUNK_SIZE):
-                    yield chunk
-        except FileNotFoundError:
-            # Handle TOCTOU race - file was deleted between check and open
-            logger.warning(f"[{request_id}] File disappeared during streaming: {validated_path}")
-        except Exception as e:
-            logger.error(f"[{request_id}] Error streaming file: {e}")
-        finally:
-            cleanup_temp_dir(temp_dir)
-
     # Validate content type to prevent serving unexpected types
     safe_content_type = validate_content_type(
         file_info.get('content_type', 'application/octet-stream')
     )
 
-    return StreamingResponse(
-        file_generator(),
+    # Serve the validated real_file_path to prevent TOCTOU attacks via symlinks.
+    # FileResponse sets Content-Length from the stat result taken above.
+    return TempDirFileResponse(
+        real_file_path,
+        cleanup=partial(cleanup_temp_dir, temp_dir),
+        stat_result=file_stat,
         media_type=safe_content_type,
         headers={
             "Content-Disposition": f'attachment; filename="{ascii_filename}"; filename*=UTF-8\'\'{encoded_filename}',
-            "Content-Length": str(file_size),
             "Cache-Control": "no-cache",
         }
     )
@@ -1,14 +1,25 @@
+import asyncio
 import atexit
 import json
 import logging
+import math
 import os
-import queue
+import re
 import secrets
 import shutil
+import stat
 import tempfile
 import threading
 import time
-from typing import Generator, Tuple, Dict, Any, Optional, NamedTuple, TypedDict
+import weakref
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from operator import itemgetter
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from typing import AsyncGenerator, Callable, Generator, List, Tuple, Dict, Any, Optional, NamedTuple, TypedDict
 
 import yt_dlp
 
@@ -16,19 +27,38 @@ from ..models.schemas import VideoInfo, VideoFormat
 from ..exceptions import VideoExtractionError, DownloadError, NetworkError, FileSizeLimitError
 from ..config import (
     MAX_FILE_SIZE,
+    MIN_FREE_TEMP_SPACE,
     YTDLP_SOCKET_TIMEOUT,
+    YTDLP_CONCURRENT_FRAGMENTS,
+    AUDIO_FORMAT,
+    YTDLP_ARIA2C_CONNECTIONS,
     DOWNLOAD_EXPIRY_SECONDS,
     MAX_COMPLETED_DOWNLOADS,
-    CHUNK_SIZE,
     ORPHAN_CLEANUP_AGE_SECONDS,
+    CLEANUP_WORKERS,
     TEMP_DIR_PREFIX,
+    TEMP_BASE_DIR,
     YTDLP_USER_AGENT,
+    YTDLP_CACHE_DIR,
     PROGRESS_POLL_INTERVAL,
+    PROGRESS_MIN_INTERVAL,
+    INFO_EXTRACTION_TIMEOUT,
+    INFO_CACHE_TTL_SECONDS,
+    INFO_CACHE_MAX_ENTRIES,
+    INFO_CACHE_RAW_MAX_ENTRIES,
+    MAX_CONCURRENT_OPERATIONS,
 )
-from ..utils import sanitize_for_log, sanitize_error_for_user
+from ..utils import sanitize_for_log, sanitize_error_for_user, TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Temp root (CATLOADER_TEMP_DIR or the system temp directory), resolved once.
+# Download dirs are created here and the orphan sweep scans it, so both
+# always agree on the location.
+_TEMP_BASE = TEMP_BASE_DIR or tempfile.gettempdir()
+if TEMP_BASE_DIR:
+    os.makedirs(_TEMP_BASE, exist_ok=True)
+
 
 # =============================================================================
 # Type Definitions for yt-dlp hooks
@@ -61,18 +91,17 @@ class DownloadResult(NamedTuple):
     filename: str
     content_type: str
     file_size: int
-    stream: Generator[bytes, None, None]
+    file: "TempDownloadFile"
 
 
 # =============================================================================
 # Local Constants (not configurable via environment)
 # =============================================================================
 # Note: Configurable constants are in config.py:
-# - DOWNLOAD_EXPIRY_SECONDS, MAX_COMPLETED_DOWNLOADS, CHUNK_SIZE
+# - DOWNLOAD_EXPIRY_SECONDS, MAX_COMPLETED_DOWNLOADS
 # - ORPHAN_CLEANUP_AGE_SECONDS, TEMP_DIR_PREFIX, YTDLP_USER_AGENT
 # - PROGRESS_POLL_INTERVAL
 
-THREAD_JOIN_TIMEOUT = 2.0  # seconds to wait for thread on cancellation
 DOWNLOAD_ID_BYTES = 32  # 256 bits of entropy for secure tokens
 
 # Maximum formats to return in API response (prevents large payloads)
@@ -95,8 +124,31 @@ _SAFE_CONTENT_TYPES = frozenset(CONTENT_TYPES.values())
 
 
 def get_content_type(ext: str) -> str:
-    """Get content type for file extension."""
-    return CONTENT_TYPES.get(ext.lower(), 'application/octet-stream')
+    """Get content type for a file extension.
+
+    Args:
+        ext: Extension including the dot, already lowercased by the caller
+            (both call sites take it from get_extension).
+    """
+    return CONTENT_TYPES.get(ext, 'application/octet-stream')
+
+
+def get_extension(filename: str) -> str:
+    """
+    Get the lowercased extension of a filename, including the dot.
+
+    Equivalent to os.path.splitext(filename)[1].lower() for the plain file
+    names used here (a leading dot, as in '.hidden', is not an extension),
+    but done with a single rfind instead of splitext's generic path handling.
+
+    Args:
+        filename: A file name (not a path).
+
+    Returns:
+        The extension such as '.mp4', or '' if there is none.
+    """
+    dot = filename.rfind('.')
+    return filename[dot:].lower() if dot > 0 else ''
 
 
 def validate_content_type(content_type: str) -> str:
@@ -130,7 +182,7 @@ def find_downloaded_file(temp_dir: str) -> Optional[str]:
 
     Scans the directory looking for final output files, avoiding intermediate
     files that yt-dlp creates during processing (like .part, .temp files).
-    Uses a single pass with preference for expected extensions.
+    Uses a single os.scandir pass with preference for expected extensions.
 
     Args:
         temp_dir: Path to the temporary directory to scan.
@@ -140,20 +192,21 @@ def find_downloaded_file(temp_dir: str) -> Optional[str]:
     """
     fallback_file = None
 
-    for file in os.listdir(temp_dir):
-        file_path = os.path.join(temp_dir, file)
-        if not os.path.isfile(file_path):
-            continue
+    # scandir exposes d_type, so is_file() needs no extra stat syscall on Linux
+    with os.scandir(temp_dir) as entries:
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False):
+                continue
 
-        ext = os.path.splitext(file)[1].lower()
+            ext = get_extension(entry.name)
 
-        # Prefer files with expected extensions (return immediately)
-        if ext in _EXPECTED_EXTENSIONS:
-            return file_path
+            # Prefer files with expected extensions (return immediately)
+            if ext in _EXPECTED_EXTENSIONS:
+                return entry.path
 
-        # Track non-intermediate files as fallback
-        if ext not in _SKIP_EXTENSIONS and fallback_file is None:
-            fallback_file = file_path
+            # Track non-intermediate files as fallback
+            if ext not in _SKIP_EXTENSIONS and fallback_file is None:
+                fallback_file = entry.path
 
     return fallback_file
 
@@ -162,76 +215,235 @@ def find_downloaded_file(temp_dir: str) -> Optional[str]:
 # In-memory store for completed downloads
 # =============================================================================
 # In production, use Redis or similar
-_completed_downloads: Dict[str, Dict[str, Any]] = {}
-_downloads_lock = threading.Lock()
+#
+# The store is split into shards keyed by crc32(download_id), each with its
+# own lock, so stores/removals of unrelated downloads don't serialize on a
+# single lock and a cleanup sweep only blocks one shard at a time.
+#
+# Within a shard, entries are inserted in creation order (created_at is
+# assigned under the shard lock), so the OrderedDict front is always the
+# oldest entry and expired entries form a contiguous prefix.
+#
+# MAX_COMPLETED_DOWNLOADS is a limit on the whole store, not per shard. A
+# global counter tracks the total (incremented on insert, decremented by
+# whichever pop claims an entry), so a store below the limit touches only
+# its own shard. Only a store that takes the count past the limit acquires
+# _store_capacity_lock to evict the globally oldest entry (the oldest of the
+# shard fronts).
+_NUM_SHARDS = 16
+
+
+class _DownloadShard:
+    """One lock-protected partition of the completed downloads store."""
+
+    __slots__ = ('lock', 'entries', 'last_sweep')
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # time.monotonic() of the last opportunistic sweep in store_completed_download
+        self.last_sweep = 0.0
+
+
+_shards: Tuple[_DownloadShard, ...] = tuple(_DownloadShard() for _ in range(_NUM_SHARDS))
+
+
+def _shard_for(download_id: str) -> _DownloadShard:
+    """Return the shard that owns download_id."""
+    return _shards[zlib.crc32(download_id.encode()) % _NUM_SHARDS]
+
+
+class _DownloadCounter:
+    """Thread-safe count of downloads in the whole store.
+
+    The lock only guards an integer update, never a shard scan, so it costs
+    the same as the shard lock a store already takes.
+    """
+
+    __slots__ = ('_lock', '_value')
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def add(self, delta: int) -> int:
+        """Adjust the count and return the new value."""
+        with self._lock:
+            self._value += delta
+            return self._value
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+_download_count = _DownloadCounter()
+_store_capacity_lock = threading.Lock()
+
+
+def _pop_download(entries: "OrderedDict[str, Dict[str, Any]]", download_id: str) -> Optional[Dict[str, Any]]:
+    """Claim an entry and keep the global count in step.
+
+    pop() is atomic, so exactly one caller gets the entry (and owns its temp
+    dir); only that caller decrements the count.
+    """
+    info = entries.pop(download_id, None)
+    if info is not None:
+        _download_count.add(-1)
+    return info
+
+
+def _evict_oldest_download() -> Optional[str]:
+    """Remove the oldest download in the whole store.
+
+    Returns its temp_dir (to clean up after releasing locks), or None if the
+    store is empty. Caller must hold _store_capacity_lock.
+    """
+    while True:
+        oldest_shard = None
+        oldest = None
+        for shard in _shards:
+            front = _peek_oldest(shard.entries)
+            if front is not None and (oldest is None or front[1]['created_at'] < oldest[1]['created_at']):
+                oldest_shard, oldest = shard, front
+        if oldest is None:
+            return None
+        # pop() is atomic: if a concurrent remove or sweep claimed the entry
+        # first, it owns the temp dir, so look for the next oldest instead
+        if _pop_download(oldest_shard.entries, oldest[0]) is not None:
+            return oldest[1]['temp_dir']
+
+
 _cleanup_thread: Optional[threading.Thread] = None
+_cleanup_thread_lock = threading.Lock()
 _shutdown_event = threading.Event()
 
 
+# Background sweep cadence (seconds). The interval halves after a sweep that
+# removed something and doubles after one that didn't, within these bounds.
+# The ceiling never exceeds DOWNLOAD_EXPIRY_SECONDS (unless that is below the
+# base interval), so an idle backoff can't keep an expired download on disk
+# for more than one extra expiry period.
+_CLEANUP_INTERVAL = 60.0
+_CLEANUP_INTERVAL_MIN = 5.0
+_CLEANUP_INTERVAL_MAX = max(_CLEANUP_INTERVAL, min(600.0, DOWNLOAD_EXPIRY_SECONDS))
+
+# Minimum seconds between orphan scans. A directory only becomes an orphan
+# after ORPHAN_CLEANUP_AGE_SECONDS, so scanning the (possibly huge, shared)
+# system temp dir more often than this finds nothing new
+_ORPHAN_SCAN_INTERVAL = min(600.0, ORPHAN_CLEANUP_AGE_SECONDS)
+
+
+def _next_cleanup_interval(interval: float, cleaned: int) -> float:
+    """Adapt the sweep interval: shorter while there is work, longer when idle."""
+    if cleaned:
+        return max(_CLEANUP_INTERVAL_MIN, interval / 2)
+    return min(_CLEANUP_INTERVAL_MAX, interval * 2)
+
+
 def _background_cleanup() -> None:
     """Periodically clean up expired downloads and orphaned temp directories."""
-    while not _shutdown_event.wait(timeout=60):
-        _cleanup_expired_downloads()
-        _cleanup_orphaned_temp_dirs()
+    interval = _CLEANUP_INTERVAL
+    # The first wake-up always scans, to pick up leftovers from a previous run
+    last_orphan_scan = float('-inf')
+    while not _shutdown_event.wait(timeout=interval):
+        cleaned = _cleanup_expired_downloads()
+        now = time.monotonic()
+        if now - last_orphan_scan >= _ORPHAN_SCAN_INTERVAL:
+            last_orphan_scan = now
+            cleaned += _cleanup_orphaned_temp_dirs()
+        interval = _next_cleanup_interval(interval, cleaned)
+
+
+def _cleanup_temp_dirs(temp_dirs: List[str]) -> None:
+    """
+    Remove several temp directories, in parallel when there is more than one.
+
+    The directories are independent, so their rmtree calls can overlap; each
+    one handles and logs its own errors.
+    """
+    if len(temp_dirs) <= 1 or CLEANUP_WORKERS <= 1:
+        for temp_dir in temp_dirs:
+            cleanup_temp_dir(temp_dir)
+        return
+
+    workers = min(CLEANUP_WORKERS, len(temp_dirs))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="catloader-cleanup") as pool:
+        # Drain the results so an unexpected exception isn't silently dropped
+        list(pool.map(cleanup_temp_dir, temp_dirs))
 
 
-def _cleanup_expired_downloads() -> None:
-    """Clean up expired downloads from the store."""
-    # Collect dirs to clean while holding lock, then clean without lock
+def _cleanup_expired_downloads() -> int:
+    """Clean up expired downloads from the store.
+
+    Returns:
+        Number of expired downloads removed.
+    """
+    # Sweep one shard at a time so stores to other shards aren't blocked.
+    # Collect dirs to clean while holding the shard lock, then clean without it
     dirs_to_clean = []
-    with _downloads_lock:
-        current_time = time.time()
-        expired = [k for k, v in _completed_downloads.items()
-                   if current_time - v.get('created_at', 0) > DOWNLOAD_EXPIRY_SECONDS]
-        for k in expired:
-            info = _completed_downloads.pop(k, None)
-            if info and 'temp_dir' in info:
-                dirs_to_clean.append(info['temp_dir'])
+    for shard in _shards:
+        # Unlocked emptiness check (atomic under the GIL): an idle shard is
+        # skipped without touching its lock. A racing store is picked up by
+        # the next sweep.
+        if not shard.entries:
+            continue
+        with shard.lock:
+            dirs_to_clean.extend(_collect_expired_downloads_locked(shard))
 
     # Do I/O cleanup outside of lock to avoid blocking other threads
-    for temp_dir in dirs_to_clean:
-        cleanup_temp_dir(temp_dir)
+    _cleanup_temp_dirs(dirs_to_clean)
 
     if dirs_to_clean:
         logger.info(f"Cleaned up {len(dirs_to_clean)} expired downloads")
+    return len(dirs_to_clean)
 
 
-def _cleanup_orphaned_temp_dirs() -> None:
+def _cleanup_orphaned_temp_dirs() -> int:
     """
     Clean up orphaned temp directories from failed/timed-out downloads.
 
     When a timeout occurs before download_video() returns, the temp directory
     is created but never tracked, leaving it orphaned. This function scans
     the system temp directory for old catloader_* directories and removes them.
+
+    Returns:
+        Number of orphaned directories removed.
     """
-    temp_base = tempfile.gettempdir()
     current_time = time.time()
-    cleaned_count = 0
+    dirs_to_clean = []
 
     try:
-        for entry in os.scandir(temp_base):
-            # Only process directories with our prefix
-            if not entry.is_dir() or not entry.name.startswith(TEMP_DIR_PREFIX):
+        for entry in os.scandir(_TEMP_BASE):
+            # Only process directories with our prefix. Check the name first
+            # (pure string op) so unrelated temp files never cost a syscall;
+            # is_dir(follow_symlinks=False) uses the cached d_type on Linux
+            if not entry.name.startswith(TEMP_DIR_PREFIX):
+                continue
+            if not entry.is_dir(follow_symlinks=False):
                 continue
 
             try:
-                # Check directory age using modification time
-                dir_mtime = entry.stat().st_mtime
+                # Check directory age using modification time. The entry is a
+                # real directory (not a symlink), so don't follow links
+                dir_mtime = entry.stat(follow_symlinks=False).st_mtime
                 age_seconds = current_time - dir_mtime
 
                 if age_seconds > ORPHAN_CLEANUP_AGE_SECONDS:
-                    cleanup_temp_dir(entry.path)
-                    cleaned_count += 1
+                    dirs_to_clean.append(entry.path)
             except OSError as e:
                 # Directory might have been deleted by another process
-                logger.debug(f"Could not check/clean orphan dir {entry.path}: {e}")
+                logger.debug(f"Could not check orphan dir {entry.path}: {e}")
                 continue
 
     except OSError as e:
         logger.warning(f"Error scanning temp directory for orphans: {e}")
 
-    if cleaned_count > 0:
-        logger.info(f"Cleaned up {cleaned_count} orphaned temp directories")
+    _cleanup_temp_dirs(dirs_to_clean)
+
+    if dirs_to_clean:
+        logger.info(f"Cleaned up {len(dirs_to_clean)} orphaned temp directories")
+    return len(dirs_to_clean)
 
 
 def _start_cleanup_thread() -> None:
@@ -243,6 +455,20 @@ def _start_cleanup_thread() -> None:
         logger.debug("Started background cleanup thread")
 
 
+def _ensure_cleanup_thread() -> None:
+    """
+    Start the background cleanup thread on first use.
+
+    Called before a download creates its temp directory, so importing this
+    module doesn't spawn a thread, yet nothing is created that the sweeps
+    won't eventually see.
+    """
+    if _cleanup_thread is not None:
+        return
+    with _cleanup_thread_lock:
+        _start_cleanup_thread()
+
+
 def _shutdown_cleanup_thread() -> None:
     """Shutdown the background cleanup thread."""
     _shutdown_event.set()
@@ -251,11 +477,15 @@ def _shutdown_cleanup_thread() -> None:
     logger.debug("Shutdown background cleanup thread")
 
 
-# Start cleanup thread on module load
-_start_cleanup_thread()
+# The cleanup thread itself starts lazily (see _ensure_cleanup_thread)
 atexit.register(_shutdown_cleanup_thread)
 
 
+# Minimum seconds between expiry sweeps triggered by store_completed_download
+_STORE_SWEEP_INTERVAL = 5.0
+
+# Every stored entry has these fields plus 'created_at', so the store's
+# internals index them directly instead of using .get() with defaults
 _REQUIRED_DOWNLOAD_FIELDS = frozenset(['file_path', 'temp_dir', 'filename', 'file_size', 'content_type'])
 
 
@@ -269,6 +499,7 @@ def store_completed_download(file_info: Dict[str, Any]) -> str:
             - filename: Original filename
             - file_size: File size in bytes
             - content_type: MIME type of the file
+            Any other keys are ignored (not stored).
 
     Returns:
         Download ID that can be used to retrieve the file
@@ -284,35 +515,50 @@ def store_completed_download(file_info: Dict[str, Any]) -> str:
     # Use cryptographically secure token
     download_id = secrets.token_urlsafe(DOWNLOAD_ID_BYTES)
 
-    # Create a copy to prevent external mutation
-    stored_info = file_info.copy()
-    stored_info['created_at'] = time.time()
+    # Copy only the required fields: prevents external mutation and never
+    # retains anything large a caller attached (e.g. a yt-dlp info dict)
+    stored_info = {key: file_info[key] for key in _REQUIRED_DOWNLOAD_FIELDS}
 
-    # Collect dirs to clean while holding lock
+    # Collect dirs to clean while holding locks, remove them afterwards
     dirs_to_clean = []
 
-    with _downloads_lock:
-        # Clean expired downloads (collect dirs only, don't do I/O)
-        dirs_to_clean.extend(_collect_expired_downloads_locked())
-
-        # Check capacity and remove oldest entries until under limit
-        # Using while loop ensures we handle traffic spikes where many downloads
-        # complete between cleanup cycles (prevents unbounded memory growth)
-        evicted_count = 0
-        while len(_completed_downloads) >= MAX_COMPLETED_DOWNLOADS:
-            oldest_key = min(
-                _completed_downloads.keys(),
-                key=lambda k: _completed_downloads[k].get('created_at', 0)
-            )
-            old_info = _completed_downloads.pop(oldest_key)
-            if old_info and 'temp_dir' in old_info:
-                dirs_to_clean.append(old_info['temp_dir'])
-            evicted_count += 1
+    shard = _shard_for(download_id)
+
+    with shard.lock:
+        # Opportunistically clean expired downloads (collect dirs only, don't
+        # do I/O), at most once per _STORE_SWEEP_INTERVAL per shard. The
+        # background thread sweeps everything else
+        now = time.monotonic()
+        if now - shard.last_sweep > _STORE_SWEEP_INTERVAL:
+            shard.last_sweep = now
+            dirs_to_clean.extend(_collect_expired_downloads_locked(shard))
+
+    # Reserve a slot in the global count. Below the limit this is the only
+    # shared state a store touches
+    capacity = max(1, MAX_COMPLETED_DOWNLOADS)
+    if _download_count.add(1) > capacity:
+        with _store_capacity_lock:
+            # Remove the oldest entries until under limit. Using while loop
+            # ensures we handle traffic spikes where many downloads complete
+            # between cleanup cycles (prevents unbounded memory growth).
+            # Slots reserved by concurrent stores aren't inserted yet and
+            # can't be evicted; those stores evict for themselves
+            evicted_count = 0
+            while _download_count.value > capacity:
+                temp_dir = _evict_oldest_download()
+                if temp_dir is None:
+                    break
+                dirs_to_clean.append(temp_dir)
+                evicted_count += 1
 
         if evicted_count > 0:
             logger.warning(f"Evicted {evicted_count} download(s) due to capacity limit")
 
-        _completed_downloads[download_id] = stored_info
+    with shard.lock:
+        # Timestamp under the lock so insertion order matches created_at order.
+        # Monotonic, so wall-clock steps (NTP) can't expire entries early or late
+        stored_info['created_at'] = time.monotonic()
+        shard.entries[download_id] = stored_info
 
     # Do I/O cleanup outside of lock
     for temp_dir in dirs_to_clean:
@@ -321,26 +567,50 @@ def store_completed_download(file_info: Dict[str, Any]) -> str:
     return download_id
 
 
-def _collect_expired_downloads_locked() -> list:
-    """Collect and remove expired downloads (must be called with lock held).
+def _peek_oldest(entries: "OrderedDict[str, Dict[str, Any]]") -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Return the oldest (key, info) pair without removing it, or None if empty.
+
+    Tolerates concurrent lock-free pops from remove_completed_download, which
+    can invalidate the iterator between creating it and reading from it.
+    """
+    while True:
+        try:
+            return next(iter(entries.items()))
+        except StopIteration:
+            return None
+        except RuntimeError:
+            # "mutated during iteration" - retry against the new front
+            continue
+
+
+def _collect_expired_downloads_locked(shard: _DownloadShard) -> list:
+    """Collect and remove expired downloads from a shard (shard lock must be held).
 
     Returns list of temp_dir paths to clean up AFTER releasing lock.
     """
     dirs_to_clean = []
-    current_time = time.time()
-    expired = [k for k, v in _completed_downloads.items()
-               if current_time - v.get('created_at', 0) > DOWNLOAD_EXPIRY_SECONDS]
-    for k in expired:
-        info = _completed_downloads.pop(k, None)
-        if info and 'temp_dir' in info:
+    entries = shard.entries
+    current_time = time.monotonic()
+    # Entries are in creation order, so stop at the first non-expired one
+    while (oldest := _peek_oldest(entries)) is not None:
+        oldest_key, info = oldest
+        if current_time - info['created_at'] <= DOWNLOAD_EXPIRY_SECONDS:
+            break
+        # pop() is atomic: if a concurrent remove_completed_download claimed
+        # the entry first, it owns the temp dir and we must not clean it
+        if _pop_download(entries, oldest_key) is not None:
             dirs_to_clean.append(info['temp_dir'])
     return dirs_to_clean
 
 
 def remove_completed_download(download_id: str) -> Optional[Dict[str, Any]]:
-    """Remove and return completed download info."""
-    with _downloads_lock:
-        return _completed_downloads.pop(download_id, None)
+    """Remove and return completed download info.
+
+    Takes no shard lock: a single OrderedDict.pop() is atomic, so exactly one
+    of this function, an expiry sweep, or a capacity eviction claims each
+    entry. The shard lock only serializes the multi-step store/sweep sequences.
+    """
+    return _pop_download(_shard_for(download_id).entries, download_id)
 
 
 # =============================================================================
@@ -354,13 +624,27 @@ def remove_completed_download(download_id: str) -> Optional[Dict[str, Any]]:
 # - Exhaust ephemeral ports under heavy load
 # - Hit connection limits on some video hosting services
 #
-# yt-dlp does not expose connection pooling configuration. Mitigations:
+# yt-dlp does not expose connection pooling configuration. Its HTTP handlers
+# belong to one YoutubeDL instance (through a private request director), and a
+# YoutubeDL instance isn't safe to share between worker threads, so a shared
+# session or urllib3 pool can't be injected without patching yt-dlp internals
+# that change between releases. Mitigations:
 # 1. The MAX_CONCURRENT_OPERATIONS semaphore limits parallel yt-dlp instances
 # 2. For very high traffic, consider:
 #    - Running multiple backend instances behind a load balancer
 #    - Implementing request queuing with rate limiting
 #    - Using a connection-pooling HTTP proxy (squid, nginx)
-#
+
+
+def _retry_backoff(n: int) -> float:
+    """Seconds to sleep before yt-dlp retry number ``n`` (0-based).
+
+    yt-dlp calls retry sleep functions by keyword (``sleep_func(n=...)``), so
+    the parameter must be named ``n``.
+    """
+    return min(0.25 * 1.5 ** n, 30.0)
+
+
 # Common yt-dlp options used by all download operations
 COMMON_OPTS = {
     # Suppress stdout output (we use progress hooks instead)
@@ -376,10 +660,25 @@ COMMON_OPTS = {
     # Per-socket timeout - limits individual HTTP operations, helps terminate
     # orphaned threads after asyncio timeout
     'socket_timeout': YTDLP_SOCKET_TIMEOUT,
-    # Internal retry count for transient network errors
-    'retries': 3,
+    # Retry counts for transient network errors. Sleeps between attempts
+    # back off exponentially (see _retry_backoff) so a rate-limited (429)
+    # source isn't hammered by immediate retries. Extractor retries stay
+    # below yt-dlp's default of 3: most extractor errors aren't transient.
+    'retries': 5,
+    'fragment_retries': 5,
+    'extractor_retries': 2,
+    'retry_sleep_functions': {
+        'http': _retry_backoff,
+        'fragment': _retry_backoff,
+        'file_access': lambda n: 0.5,
+    },
 }
 
+if YTDLP_CACHE_DIR:
+    # Persistent cache for player JS / signature data shared by all instances
+    COMMON_OPTS['cachedir'] = YTDLP_CACHE_DIR
+
+
 # Add JavaScript runtime options for yt-dlp >= 2025.1.1
 # These options are required for YouTube challenge solving but cause errors on older versions
 def _get_ytdlp_version() -> tuple:
@@ -393,6 +692,7 @@ def _get_ytdlp_version() -> tuple:
         logger.warning(f"Could not parse yt-dlp version, assuming old version: {e}")
         return (0, 0, 0)
 
+
 _YTDLP_VERSION = _get_ytdlp_version()
 _MIN_JS_RUNTIME_VERSION = (2025, 1, 1)
 
@@ -409,6 +709,117 @@ else:
     )
 
 
+# Per-operation option templates, merged once at import (after the version
+# checks above have finished adjusting COMMON_OPTS). YoutubeDL writes into
+# the params dict it receives, so callers must pass a .copy(), never the
+# template itself.
+_YDL_OPTS_INFO: Dict[str, Any] = {
+    **COMMON_OPTS,
+    'extract_flat': False,
+    # Listing formats doesn't need the test requests some extractors ask for;
+    # the download itself still verifies the format it picks
+    'check_formats': False,
+}
+_YDL_OPTS_DOWNLOAD: Dict[str, Any] = {
+    **COMMON_OPTS,
+    # Fetch HLS/DASH fragments in parallel (no effect on progressive formats)
+    'concurrent_fragment_downloads': max(1, YTDLP_CONCURRENT_FRAGMENTS),
+}
+# The SSE progress path always uses the native downloader: its progress
+# hooks are where a client disconnect cancels the download, and external
+# downloaders only report once the transfer has finished
+_YDL_OPTS_PROGRESS_DOWNLOAD: Dict[str, Any] = dict(_YDL_OPTS_DOWNLOAD)
+
+if YTDLP_ARIA2C_CONNECTIONS > 1:
+    if shutil.which('aria2c'):
+        # Multi-connection range GETs for progressive HTTP bodies only; the
+        # 'http' key leaves HLS/DASH on the native fragment downloader.
+        _aria2c_conns = str(min(YTDLP_ARIA2C_CONNECTIONS, 16))
+        _YDL_OPTS_DOWNLOAD['external_downloader'] = {'http': 'aria2c'}
+        _YDL_OPTS_DOWNLOAD['external_downloader_args'] = {
+            'aria2c': ['-x', _aria2c_conns, '-s', _aria2c_conns, '-k', '1M', '--file-allocation=none'],
+        }
+    else:
+        logger.warning(
+            "CATLOADER_YTDLP_ARIA2C_CONNECTIONS is set but aria2c is not on PATH; "
+            "using the built-in downloader"
+        )
+
+
+class _YoutubeDLPool:
+    """
+    Reusable YoutubeDL instances built from one fixed set of options.
+
+    Constructing a YoutubeDL registers every extractor (~50ms of CPU with the
+    GIL held), and a kept instance also keeps its HTTP connections alive.
+    Instances are used by one thread at a time; the yt-dlp CLI likewise runs
+    many URLs through one instance. Only option sets without per-request
+    state can be pooled: hooks, output templates and postprocessors are bound
+    when the instance is constructed, so downloads still build their own.
+    """
+
+    def __init__(self, opts: Dict[str, Any], max_idle: int):
+        self._opts = opts
+        self._max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[ExitStack, yt_dlp.YoutubeDL]] = []
+
+    @contextmanager
+    def borrow(self) -> Generator[yt_dlp.YoutubeDL, None, None]:
+        """
+        Borrow an instance for the duration of the with block.
+
+        An instance whose use raised is closed rather than returned, so a
+        failure can't leave odd state behind for the next request. A returned
+        instance has its cookie jar emptied: cookies a site set while serving
+        one user's URL must not be sent with another user's requests. No
+        credentials are configured, so extractors hold no login state; they
+        only keep per-site caches (e.g. player JS) that are safe to share.
+        """
+        with self._lock:
+            item = self._idle.pop() if self._idle else None
+        if item is None:
+            stack = ExitStack()
+            # YoutubeDL mutates the params dict it is given: pass a copy
+            item = (stack, stack.enter_context(yt_dlp.YoutubeDL(self._opts.copy())))
+
+        try:
+            yield item[1]
+        except BaseException:
+            item[0].close()
+            raise
+
+        item[1].cookiejar.clear()
+        with self._lock:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(item)
+                item = None
+        if item is not None:
+            item[0].close()
+
+    def clear(self) -> None:
+        """Close and drop all idle instances."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for stack, _ in idle:
+            stack.close()
+
+
+# At most MAX_CONCURRENT_OPERATIONS extractions run at once, so that many
+# idle instances cover every concurrent lookup
+_info_ydl_pool = _YoutubeDLPool(_YDL_OPTS_INFO, max_idle=MAX_CONCURRENT_OPERATIONS)
+
+
+# Audio formats FFmpegExtractAudio can produce by copying the source stream.
+# For audio-only downloads, a source already in that codec is preferred, so
+# the postprocessor only rewrites the container ('best' keeps any source codec)
+_AUDIO_COPY_FILTERS = {
+    'm4a': '[acodec^=mp4a]',
+    'opus': '[acodec=opus]',
+    'mp3': '[acodec=mp3]',
+}
+
+
 def _configure_format_options(ydl_opts: Dict[str, Any], format_id: str, audio_only: bool) -> None:
     """
     Configure yt-dlp format options for download.
@@ -422,13 +833,18 @@ def _configure_format_options(ydl_opts: Dict[str, Any], format_id: str, audio_on
         audio_only: Whether to download audio only
     """
     if audio_only:
-        ydl_opts['format'] = 'bestaudio/best'
-        ydl_opts['postprocessors'] = [{
+        copy_filter = _AUDIO_COPY_FILTERS.get(AUDIO_FORMAT)
+        ydl_opts['format'] = f'bestaudio{copy_filter}/bestaudio/best' if copy_filter else 'bestaudio/best'
+        extract_audio = {
             'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
+            # FFmpegExtractAudio copies the stream instead of re-encoding when
+            # the source already matches ('best' always matches)
+            'preferredcodec': AUDIO_FORMAT,
+        }
+        if AUDIO_FORMAT == 'mp3':
             # 320 kbps is the maximum quality for MP3
-            'preferredquality': '320',
-        }]
+            extract_audio['preferredquality'] = '320'
+        ydl_opts['postprocessors'] = [extract_audio]
     else:
         if format_id and format_id != 'best':
             ydl_opts['format'] = format_id
@@ -437,21 +853,173 @@ def _configure_format_options(ydl_opts: Dict[str, Any], format_id: str, audio_on
         ydl_opts['merge_output_format'] = 'mp4'
 
 
+# =============================================================================
+# Video info cache
+# =============================================================================
+# Repeated lookups of the same URL (e.g. the frontend re-fetching info) are
+# served from memory for INFO_CACHE_TTL_SECONDS. Concurrent lookups for a URL
+# that is already being extracted wait for that extraction instead of
+# starting their own yt-dlp run (single-flight).
+#
+# The sanitized raw yt-dlp info dict from the same extraction is kept in a
+# second, smaller cache so a download that follows an info lookup can skip
+# re-extraction (see _extract_for_download).
+_video_info_cache = TTLCache(maxsize=INFO_CACHE_MAX_ENTRIES, ttl=INFO_CACHE_TTL_SECONDS)
+_raw_info_cache = TTLCache(maxsize=INFO_CACHE_RAW_MAX_ENTRIES, ttl=INFO_CACHE_TTL_SECONDS)
+_info_inflight: Dict[str, threading.Event] = {}
+_info_inflight_lock = threading.Lock()
+
+# Share/tracking query parameters that never change what a URL points to.
+# Stripped from cache keys so e.g. a YouTube link with and without ?si=...
+# shares one cache entry. The generic set is safe on any site; the YouTube
+# set is only known to be tracking-only on YouTube (elsewhere e.g. ?pp= may
+# select content), so it is limited to YouTube hosts.
+_TRACKING_PARAMS = frozenset(['fbclid', 'gclid', 'igshid'])
+_YOUTUBE_TRACKING_PARAMS = frozenset(['si', 'feature', 'pp'])
+_YOUTUBE_HOSTS = ('youtube.com', 'youtu.be')
+
+
+def _is_youtube_host(hostname: Optional[str]) -> bool:
+    """Whether hostname is youtube.com / youtu.be or one of their subdomains."""
+    return bool(hostname) and any(
+        hostname == host or hostname.endswith('.' + host) for host in _YOUTUBE_HOSTS
+    )
+
+
+def _info_cache_key(url: str) -> str:
+    """Cache key for a URL: the URL without tracking query parameters."""
+    if '?' not in url:
+        return url
+    parts = urlsplit(url)
+    youtube = _is_youtube_host(parts.hostname)
+    query = [
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not (
+            name in _TRACKING_PARAMS
+            or name.startswith('utm_')
+            or (youtube and name in _YOUTUBE_TRACKING_PARAMS)
+        )
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
 def get_video_info(url: str) -> VideoInfo:
-    """Extract video information without downloading."""
-    ydl_opts = {
-        **COMMON_OPTS,
-        'extract_flat': False,
-    }
+    """Extract video information without downloading (cached per URL)."""
+    if INFO_CACHE_TTL_SECONDS <= 0:
+        return _extract_video_info(url)
+
+    key = _info_cache_key(url)
+    cached = _video_info_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with _info_inflight_lock:
+        event = _info_inflight.get(key)
+        is_leader = event is None
+        if is_leader:
+            event = _info_inflight[key] = threading.Event()
+
+    if not is_leader:
+        # Another thread is extracting this URL - wait for its result
+        event.wait(timeout=INFO_EXTRACTION_TIMEOUT)
+        cached = _video_info_cache.get(key)
+        if cached is not None:
+            return cached
+        # Leader failed or timed out - extract on our own
+        return _extract_video_info(url)
 
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = _extract_video_info(url)
+        _video_info_cache.set(key, info)
+        return info
+    finally:
+        with _info_inflight_lock:
+            _info_inflight.pop(key, None)
+        event.set()
+
+
+def invalidate_video_info(url: str) -> bool:
+    """
+    Drop the cached video info for a URL so the next lookup re-extracts it.
+
+    Args:
+        url: URL whose cached info should be discarded.
+
+    Returns:
+        True if a live cache entry was removed.
+    """
+    key = _info_cache_key(url)
+    _raw_info_cache.pop(key)
+    return _video_info_cache.pop(key) is not None
+
+
+def _raw_info_cache_enabled() -> bool:
+    """Whether raw info dicts are cached for reuse by downloads."""
+    return INFO_CACHE_TTL_SECONDS > 0 and INFO_CACHE_RAW_MAX_ENTRIES > 0
+
+
+# Errors from replaying cached metadata that a fresh extraction can fix (the
+# same set yt-dlp's --load-info-json falls back on)
+_STALE_INFO_ERRORS = (
+    yt_dlp.utils.DownloadError,
+    yt_dlp.utils.EntryNotInPlaylist,
+    yt_dlp.utils.ReExtractInfo,
+)
+
+
+def _extract_for_download(ydl: yt_dlp.YoutubeDL, url: str) -> Optional[Dict[str, Any]]:
+    """
+    Run a download, reusing metadata from a recent info lookup when possible.
+
+    With cached metadata the download goes straight to format selection via
+    process_ie_result (the same path as yt-dlp's --load-info-json), skipping
+    the page, API and player requests extract_info would repeat.
+
+    Args:
+        ydl: Configured YoutubeDL instance.
+        url: URL being downloaded.
+
+    Returns:
+        yt-dlp's info dict for the download (may be None).
+    """
+    key = _info_cache_key(url)
+    cached = _raw_info_cache.get(key) if _raw_info_cache_enabled() else None
+    if cached is None:
+        return ydl.extract_info(url, download=True)
+    logger.debug(f"Reusing cached metadata for {sanitize_for_log(url)}")
+    try:
+        # process_ie_result mutates its input, so give it a private deep copy
+        return ydl.process_ie_result(yt_dlp.YoutubeDL.sanitize_info(cached), download=True)
+    except _STALE_INFO_ERRORS as e:
+        # Cached metadata no longer works (e.g. expired format URLs). Like
+        # --load-info-json, retry once with a fresh extraction
+        _raw_info_cache.pop(key)
+        logger.warning(f"Cached metadata failed for {sanitize_for_log(url)} ({e}); re-extracting")
+        return ydl.extract_info(url, download=True)
+
+
+# Top-level info dict fields that downloads never use (no subtitle, thumbnail
+# or comment writing is configured); stripped before caching raw info
+_UNUSED_INFO_KEYS = ('automatic_captions', 'subtitles', 'heatmap', 'thumbnails', 'comments')
+
+# Classification of yt-dlp DownloadError messages (case-insensitive, so the
+# full message isn't lowercased into a copy first)
+_UNSUPPORTED_URL_RE = re.compile(r'unsupported url|is not a valid url', re.IGNORECASE)
+_NETWORK_ERROR_RE = re.compile(
+    r'network|connection|timeout|timed out|unreachable', re.IGNORECASE
+)
+
+
+def _extract_video_info(url: str) -> VideoInfo:
+    """Extract video information without downloading."""
+    try:
+        with _info_ydl_pool.borrow() as ydl:
             info = ydl.extract_info(url, download=False)
     except yt_dlp.utils.DownloadError as e:
-        error_msg = str(e).lower()
-        if 'unsupported url' in error_msg or 'is not a valid url' in error_msg:
+        error_msg = str(e)
+        if _UNSUPPORTED_URL_RE.search(error_msg):
             raise VideoExtractionError(f"Unsupported or invalid URL: {url}") from e
-        elif 'network' in error_msg or 'connection' in error_msg or 'timeout' in error_msg:
+        elif _NETWORK_ERROR_RE.search(error_msg):
             raise NetworkError(f"Network error while fetching video info: {e}") from e
         else:
             raise VideoExtractionError(f"Could not extract video information: {e}") from e
@@ -468,86 +1036,89 @@ def get_video_info(url: str) -> VideoInfo:
     if info is None:
         raise VideoExtractionError("Could not extract video information")
 
+    # Only single videos are cached for reuse: sanitize_info drops a playlist
+    # result's entries, so replaying one couldn't download anything
+    if _raw_info_cache_enabled() and info.get('_type', 'video') == 'video':
+        # Neither the format list below nor a later download reads these, and
+        # captions alone can be megabytes (every track in every language).
+        # Dropping them first also spares sanitize_info from copying them
+        for key in _UNUSED_INFO_KEYS:
+            info.pop(key, None)
+        # Drop the results of this run's own format selection (as
+        # --load-info-json does) so a download can redo it for its format
+        _raw_info_cache.set(_info_cache_key(url), yt_dlp.YoutubeDL.sanitize_info(info, remove_private_keys=True))
+
     video_formats = []
-    audio_formats = []
-    seen_resolutions = set()
+    audio_candidates: List[Tuple[int, VideoFormat]] = []
     seen_audio = set()
 
     formats = info.get('formats', [])
 
-    # Collect all available resolutions (including video-only formats)
-    available_heights = set()
+    # Single pass over formats: largest video size per available height
+    # (including video-only formats) and the largest audio-only size
+    video_size_by_height: Dict[int, int] = {}
     best_audio_size = 0
 
     for fmt in formats:
-        has_video = fmt.get('vcodec', 'none') != 'none'
-        has_audio = fmt.get('acodec', 'none') != 'none'
-        height = fmt.get('height')
-        filesize = fmt.get('filesize') or fmt.get('filesize_approx') or 0
+        # Bind the lookup once: formats lists run to dozens of entries
+        get = fmt.get
+        has_video = get('vcodec', 'none') != 'none'
+        has_audio = get('acodec', 'none') != 'none'
+        filesize = get('filesize') or get('filesize_approx') or 0
 
-        if has_video and height:
-            available_heights.add(height)
+        if has_video:
+            height = get('height')
+            if height and filesize >= video_size_by_height.get(height, 0):
+                video_size_by_height[height] = filesize
 
         # Track audio formats
-        if has_audio and not has_video:
-            abr = fmt.get('abr', 0)
-            ext = fmt.get('ext', 'unknown')
-            format_id = fmt.get('format_id', '')
-            audio_key = f"{int(abr) if abr else 0}_{ext}"
+        elif has_audio:
+            abr = int(get('abr') or 0)
+            ext = get('ext', 'unknown')
+            # (bitrate, ext) pairs identify duplicates without building a string
+            audio_key = (abr, ext)
 
             if abr and audio_key not in seen_audio:
                 seen_audio.add(audio_key)
-                audio_formats.append(VideoFormat(
-                    format_id=format_id,
+                # Keep the integer bitrate alongside the model as its sort key
+                audio_candidates.append((abr, VideoFormat(
+                    format_id=get('format_id', ''),
                     ext=ext,
                     resolution=None,
                     filesize=filesize if filesize else None,
                     has_audio=True,
                     has_video=False,
-                    quality_label=f"{int(abr)}kbps ({ext.upper()})"
-                ))
+                    quality_label=f"{abr}kbps ({ext.upper()})"
+                )))
             if filesize > best_audio_size:
                 best_audio_size = filesize
 
-    # Create video format options for each resolution
+    # Create video format options for each resolution, highest first
     # Use yt-dlp format selection to combine best video at height + best audio
-    for height in sorted(available_heights, reverse=True):
+    for height in sorted(video_size_by_height, reverse=True):
         resolution = f"{height}p"
-        if resolution not in seen_resolutions:
-            seen_resolutions.add(resolution)
-
-            # Estimate total size (video + audio)
-            video_size = 0
-            for fmt in formats:
-                if fmt.get('height') == height and fmt.get('vcodec', 'none') != 'none':
-                    size = fmt.get('filesize') or fmt.get('filesize_approx') or 0
-                    if size > video_size:
-                        video_size = size
-
-            total_size = video_size + best_audio_size if video_size else None
-
-            # Format string that tells yt-dlp to get best video at this height + best audio
-            format_string = f"bestvideo[height<={height}]+bestaudio/best[height<={height}]"
-
-            video_formats.append(VideoFormat(
-                format_id=format_string,
-                ext='mp4',
-                resolution=resolution,
-                filesize=total_size,
-                has_audio=True,
-                has_video=True,
-                quality_label=f"{resolution} (MP4)"
-            ))
-
-    # Sort by quality (resolution/bitrate)
-    video_formats.sort(
-        key=lambda x: int(x.resolution.replace('p', '')) if x.resolution and x.resolution != 'best' else 0,
-        reverse=True
-    )
-    audio_formats.sort(
-        key=lambda x: int(x.quality_label.split('kbps')[0]) if x.quality_label and 'kbps' in x.quality_label else 0,
-        reverse=True
-    )
+
+        # Estimate total size (video + audio)
+        video_size = video_size_by_height[height]
+        total_size = video_size + best_audio_size if video_size else None
+
+        # Format string that tells yt-dlp to get best video at this height + best audio
+        format_string = f"bestvideo[height<={height}]+bestaudio/best[height<={height}]"
+
+        video_formats.append(VideoFormat(
+            format_id=format_string,
+            ext='mp4',
+            resolution=resolution,
+            filesize=total_size,
+            has_audio=True,
+            has_video=True,
+            quality_label=f"{resolution} (MP4)"
+        ))
+
+    # Sort by quality. Video formats are already in descending height order;
+    # audio formats are sorted on the precomputed bitrate (no string parsing)
+    audio_candidates.sort(key=itemgetter(0), reverse=True)
+    audio_formats = [fmt for _, fmt in audio_candidates]
 
     # If no formats found, create fallback options
     if not video_formats:
@@ -580,43 +1151,163 @@ def get_video_info(url: str) -> VideoInfo:
     )
 
 
+def get_temp_root() -> str:
+    """Directory that holds the per-download temp directories."""
+    return _TEMP_BASE
+
+
+def has_free_temp_space() -> bool:
+    """
+    Check whether the temp filesystem has room to start another download.
+
+    One statvfs call, cheap enough to run per request.
+
+    Returns:
+        False if free space is below MIN_FREE_TEMP_SPACE, True otherwise
+        (including when the check is disabled or can't be performed).
+    """
+    if MIN_FREE_TEMP_SPACE <= 0:
+        return True
+    try:
+        return shutil.disk_usage(_TEMP_BASE).free >= MIN_FREE_TEMP_SPACE
+    except OSError as e:
+        # Can't tell - don't block downloads on a failed check
+        logger.warning(f"Could not check free space in {_TEMP_BASE}: {e}")
+        return True
+
+
 def cleanup_temp_dir(temp_dir: str) -> None:
     """Safely cleanup temporary directory and its contents."""
+    # No exists() pre-check: rmtree reports a missing directory itself, which
+    # saves a stat per call on cleanup sweeps.
     try:
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
-            logger.debug(f"Cleaned up temp directory: {temp_dir}")
+        shutil.rmtree(temp_dir)
+        logger.debug(f"Cleaned up temp directory: {temp_dir}")
+    except FileNotFoundError:
+        pass
     except OSError as e:
         logger.warning(f"Failed to cleanup temp directory {temp_dir}: {e}")
 
 
+# Single background thread for removals nobody has to wait for (e.g. after a
+# response has been fully sent). Queued work still runs at interpreter exit.
+_deferred_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catloader-deferred-cleanup")
+
+
+def _run_deferred_cleanup(cleanup: Callable[[], None]) -> None:
+    try:
+        cleanup()
+    except Exception:
+        logger.exception("Deferred cleanup failed")
+
+
+def defer_cleanup(cleanup: Callable[[], None]) -> None:
+    """
+    Run a cleanup callable on the background cleanup thread.
+
+    Returns immediately, so an rmtree of a large temp directory doesn't hold
+    up the request that produced it.
+    """
+    _deferred_cleanup_executor.submit(_run_deferred_cleanup, cleanup)
+
+
+class TempDownloadFile:
+    """
+    A downloaded file that owns its temp directory.
+
+    The route serves the file from path and calls close() once the response
+    is done (or failed). The temp directory is removed exactly once: on
+    close(), when the object is garbage-collected without being closed, or
+    at interpreter exit.
+    """
+
+    def __init__(self, file_path: str, temp_dir: str):
+        self._file_path = file_path
+        # The finalizer references only temp_dir, never self, so dropping the
+        # last reference cleans up immediately (no wait for the cyclic GC)
+        self._finalizer = weakref.finalize(self, cleanup_temp_dir, temp_dir)
+
+    @property
+    def path(self) -> str:
+        """Path of the downloaded file."""
+        return self._file_path
+
+    def close(self) -> None:
+        """Remove the temp directory (idempotent, thread-safe)."""
+        self._finalizer()
+
+
+def _resolve_downloaded_file(temp_dir: str, info: Optional[Dict[str, Any]]) -> Optional[Tuple[str, int]]:
+    """
+    Get the path and size of the finished download.
+
+    Uses the path yt-dlp reports in its info dict when there is one, which is
+    more reliable than scanning the directory (yt-dlp creates intermediate
+    files during merging, e.g. .part, .temp, separate audio/video) and skips
+    the scan entirely on the happy path.
+
+    Args:
+        temp_dir: Directory the download was written to.
+        info: Info dict returned by extract_info(download=True), if available.
+
+    Returns:
+        Tuple of (path, size in bytes) of the downloaded file, or None if not
+        found. The size comes from the same stat that checks the file exists.
+    """
+    downloaded_file = None
+
+    if info:
+        # Primary method: use requested_downloads which contains the final file path
+        if info.get('requested_downloads'):
+            downloaded_file = info['requested_downloads'][0].get('filepath')
+
+        # Fallback: use _filename if available (older yt-dlp versions)
+        if not downloaded_file:
+            downloaded_file = info.get('_filename')
+
+    if downloaded_file:
+        try:
+            file_stat = os.stat(downloaded_file)
+        except OSError:
+            file_stat = None
+        if file_stat is not None and stat.S_ISREG(file_stat.st_mode):
+            return downloaded_file, file_stat.st_size
+
+    # Last resort: scan directory for files matching expected extensions
+    # This handles edge cases where yt-dlp doesn't populate the info dict correctly
+    # (find_downloaded_file only returns regular files, no need to re-check)
+    downloaded_file = find_downloaded_file(temp_dir)
+    if not downloaded_file:
+        return None
+    return downloaded_file, os.path.getsize(downloaded_file)
+
+
 def download_video(url: str, format_id: str, audio_only: bool = False) -> DownloadResult:
     """
-    Download video/audio and return a DownloadResult with file info and stream.
+    Download video/audio and return a DownloadResult with file info.
 
     Returns:
-        DownloadResult with filename, content_type, file_size, and stream generator
+        DownloadResult with filename, content_type, file_size, and the
+        TempDownloadFile to serve (close it to remove the temp directory)
 
     Raises:
         DownloadError: If download fails
         NetworkError: If network error occurs
     """
-    temp_dir = tempfile.mkdtemp(prefix=TEMP_DIR_PREFIX)
+    _ensure_cleanup_thread()
+    temp_dir = tempfile.mkdtemp(prefix=TEMP_DIR_PREFIX, dir=_TEMP_BASE)
     output_template = os.path.join(temp_dir, '%(title)s.%(ext)s')
 
-    ydl_opts = {
-        **COMMON_OPTS,
-        'outtmpl': output_template,
-    }
+    ydl_opts = _YDL_OPTS_DOWNLOAD.copy()
+    ydl_opts['outtmpl'] = output_template
     _configure_format_options(ydl_opts, format_id, audio_only)
 
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
+            info = _extract_for_download(ydl, url)
     except yt_dlp.utils.DownloadError as e:
         cleanup_temp_dir(temp_dir)
-        error_msg = str(e).lower()
-        if 'network' in error_msg or 'connection' in error_msg or 'timeout' in error_msg:
+        if _NETWORK_ERROR_RE.search(str(e)):
             raise NetworkError(f"Network error during download: {e}") from e
         raise DownloadError(f"Download failed: {e}") from e
     except (OSError, ConnectionError, TimeoutError) as e:
@@ -635,30 +1326,14 @@ def download_video(url: str, format_id: str, audio_only: bool = False) -> Downlo
         cleanup_temp_dir(temp_dir)
         raise DownloadError("Could not download video")
 
-    # Get the downloaded file path from yt-dlp's info dict
-    # This is more reliable than scanning the directory because yt-dlp creates
-    # intermediate files during merging (e.g., .part, .temp, separate audio/video)
-    downloaded_file = None
-
-    # Primary method: use requested_downloads which contains the final file path
-    if 'requested_downloads' in info and info['requested_downloads']:
-        downloaded_file = info['requested_downloads'][0].get('filepath')
+    resolved = _resolve_downloaded_file(temp_dir, info)
 
-    # Fallback: use _filename if available (older yt-dlp versions)
-    if not downloaded_file and '_filename' in info:
-        downloaded_file = info['_filename']
-
-    # Last resort: scan directory for files matching expected extensions
-    # This handles edge cases where yt-dlp doesn't populate the info dict correctly
-    if not downloaded_file or not os.path.isfile(downloaded_file):
-        downloaded_file = find_downloaded_file(temp_dir)
-
-    if not downloaded_file or not os.path.isfile(downloaded_file):
+    if not resolved:
         cleanup_temp_dir(temp_dir)
         raise DownloadError("Download completed but file not found")
 
+    downloaded_file, file_size = resolved
     filename = os.path.basename(downloaded_file)
-    file_size = os.path.getsize(downloaded_file)
 
     # Check file size limit (0 means no limit)
     if MAX_FILE_SIZE > 0 and file_size > MAX_FILE_SIZE:
@@ -669,46 +1344,138 @@ def download_video(url: str, format_id: str, audio_only: bool = False) -> Downlo
             f"File size ({size_mb:.1f} MB) exceeds maximum allowed ({limit_mb:.1f} MB)"
         )
 
-    ext = os.path.splitext(filename)[1].lower()
+    ext = get_extension(filename)
     content_type = get_content_type(ext)
 
-    def file_generator() -> Generator[bytes, None, None]:
-        """Generator that streams file and cleans up when done or on error."""
-        try:
-            with open(downloaded_file, 'rb') as f:
-                while chunk := f.read(CHUNK_SIZE):
-                    yield chunk
-        except GeneratorExit:
-            # Client cancelled the download
-            logger.info(f"Client cancelled download: {filename}")
-        except Exception as e:
-            logger.error(f"Error streaming file {filename}: {e}")
-        finally:
-            cleanup_temp_dir(temp_dir)
-
     return DownloadResult(
         filename=filename,
         content_type=content_type,
         file_size=file_size,
-        stream=file_generator()
+        file=TempDownloadFile(downloaded_file, temp_dir)
+    )
+
+
+def _finalize_progress_download(temp_dir: str, info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Locate the finished download, enforce the size limit, and register it.
+
+    Blocking filesystem work, run off the event loop by
+    download_video_with_progress().
+
+    Args:
+        temp_dir: Directory the download was written to.
+        info: Info dict returned by yt-dlp, if the download thread captured one.
+
+    Returns:
+        The final SSE payload ('complete' or 'error').
+    """
+    resolved = _resolve_downloaded_file(temp_dir, info)
+
+    if not resolved:
+        cleanup_temp_dir(temp_dir)
+        return {'status': 'error', 'message': 'File not found'}
+
+    downloaded_file, file_size = resolved
+    filename = os.path.basename(downloaded_file)
+
+    # Check file size limit (0 means no limit) - same check as download_video
+    if MAX_FILE_SIZE > 0 and file_size > MAX_FILE_SIZE:
+        cleanup_temp_dir(temp_dir)
+        size_mb = file_size / (1024 * 1024)
+        limit_mb = MAX_FILE_SIZE / (1024 * 1024)
+        return {'status': 'error', 'message': f'File size ({size_mb:.1f} MB) exceeds maximum allowed ({limit_mb:.1f} MB)'}
+
+    ext = get_extension(filename)
+    content_type = get_content_type(ext)
+
+    # Store download info and get ID
+    # Note: We preserve the original filename (including Unicode characters).
+    # The download endpoint will use sanitize_filename() to create both an
+    # ASCII fallback and a UTF-8 encoded version for Content-Disposition header.
+    download_id = store_completed_download({
+        'filename': filename,  # Preserve original Unicode filename
+        'file_size': file_size,
+        'content_type': content_type,
+        'temp_dir': temp_dir,
+        'file_path': downloaded_file,
+    })
+
+    # For the SSE response, provide an ASCII-safe version for display
+    # The actual download will use the original filename via the stored info
+    if filename.isascii():
+        display_filename = filename
+    else:
+        display_filename = filename.encode('ascii', 'replace').decode('ascii')
+
+    return {'status': 'complete', 'download_id': download_id, 'filename': display_filename, 'file_size': file_size}
+
+
+# Sentinel queued by the download thread once it has finished
+_PROGRESS_DONE = object()
+
+
+def _sse_event(data: Dict[str, Any]) -> str:
+    """Format a payload as an SSE data frame."""
+    return f"data: {json.dumps(data)}\n\n"
+
+
+def _json_number(value: Any) -> Any:
+    """Render an int/float/None progress field as a JSON number or null.
+
+    yt-dlp can report inf/nan speeds and ETAs; those have no JSON form
+    (JSON.parse rejects them), so they are sent as null like a missing value.
+    """
+    if value is None or (isinstance(value, float) and not math.isfinite(value)):
+        return 'null'
+    return value
+
+
+def _sse_progress_event(percent: float, downloaded: int, total: int, speed: Any, eta: Any, phase: str) -> str:
+    """
+    Format a 'downloading' SSE frame from a fixed template.
+
+    This is the only high-frequency event. Its fields are numbers (or None)
+    plus a phase that is always 'audio' or 'video', so nothing needs
+    escaping and the output matches json.dumps of the equivalent dict
+    (with non-finite numbers as null) without walking a dict per event.
+    """
+    return (
+        f'data: {{"status": "downloading", "percent": {_json_number(percent)}, '
+        f'"downloaded": {_json_number(downloaded)}, "total": {total}, '
+        f'"speed": {_json_number(speed)}, "eta": {_json_number(eta)}, "phase": "{phase}"}}\n\n'
     )
 
 
-def download_video_with_progress(url: str, format_id: str, audio_only: bool = False) -> Generator[str, None, None]:
+# Constant events, serialized once instead of on every poll timeout / hook call
+_SSE_WAITING_EVENT = _sse_event({'status': 'waiting'})
+_SSE_PROCESSING_EVENT = _sse_event({'status': 'processing', 'percent': 100, 'message': 'Processing...'})
+_SSE_FINALIZING_EVENT = _sse_event({'status': 'processing', 'percent': 100, 'message': 'Finalizing...'})
+
+
+async def download_video_with_progress(url: str, format_id: str, audio_only: bool = False) -> AsyncGenerator[str, None]:
     """
     Download video/audio and yield SSE events with progress updates.
 
+    yt-dlp runs in a daemon thread; its hooks hand progress events to the
+    event loop with call_soon_threadsafe, so the consumer awaits an
+    asyncio.Queue instead of blocking a worker thread on queue polling.
+
     Yields:
         SSE-formatted strings with progress data
     """
-    temp_dir = tempfile.mkdtemp(prefix=TEMP_DIR_PREFIX)
+    loop = asyncio.get_running_loop()
+    _ensure_cleanup_thread()
+    temp_dir = tempfile.mkdtemp(prefix=TEMP_DIR_PREFIX, dir=_TEMP_BASE)
     output_template = os.path.join(temp_dir, '%(title)s.%(ext)s')
-    progress_queue: queue.Queue = queue.Queue()
+    progress_queue: asyncio.Queue = asyncio.Queue()
     download_complete = threading.Event()
     cancelled = threading.Event()
     download_error: Dict[str, Any] = {}
+    # yt-dlp's info dict, written by the download thread before it signals
+    # _PROGRESS_DONE (the queue hand-off orders the write before our read)
+    download_result: Dict[str, Any] = {}
 
-    # Lock to protect shared mutable state accessed from both the main thread
+    # Lock to protect shared mutable state accessed from both the event loop
     # (SSE loop) and the download thread (progress/postprocessor hooks)
     state_lock = threading.Lock()
 
@@ -726,8 +1493,22 @@ def download_video_with_progress(url: str, format_id: str, audio_only: bool = Fa
         'is_audio_only': audio_only,
     }
 
+    # time.monotonic() of the last 'downloading' event. Only touched by the
+    # download thread (yt-dlp calls its hooks sequentially), so no lock
+    last_progress_emit = 0.0
+
+    def publish(item: Any) -> None:
+        """Hand an SSE frame (or _PROGRESS_DONE) from the download thread to the event loop's queue."""
+        try:
+            loop.call_soon_threadsafe(progress_queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop already closed (e.g. server shutdown) - nobody is listening
+            pass
+
     def progress_hook(d: ProgressHookData) -> None:
         """Hook called by yt-dlp with download progress."""
+        nonlocal last_progress_emit
+
         # Check if cancelled
         if cancelled.is_set():
             raise Exception("Download cancelled by client")
@@ -735,6 +1516,13 @@ def download_video_with_progress(url: str, format_id: str, audio_only: bool = Fa
         if d['status'] == 'downloading':
             total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
             downloaded = d.get('downloaded_bytes', 0)
+
+            # Coalesce high-rate hook calls: drop updates that arrive too soon
+            # after the previous one, but always send a stream's final update
+            now = time.monotonic()
+            if now - last_progress_emit < PROGRESS_MIN_INTERVAL and not (0 < total <= downloaded):
+                return
+            last_progress_emit = now
             speed = d.get('speed', 0)
             eta = d.get('eta', 0)
 
@@ -775,21 +1563,9 @@ def download_video_with_progress(url: str, format_id: str, audio_only: bool = Fa
                     # Default to 'video' as it's typically the first/larger stream
                     phase = 'video'
 
-            progress_queue.put({
-                'status': 'downloading',
-                'percent': round(percent, 1),
-                'downloaded': downloaded,
-                'total': total,
-                'speed': speed,
-                'eta': eta,
-                'phase': phase,
-            })
+            publish(_sse_progress_event(round(percent, 1), downloaded, total, speed, eta, phase))
         elif d['status'] == 'finished':
-            progress_queue.put({
-                'status': 'processing',
-                'percent': 100,
-                'message': 'Processing...',
-            })
+            publish(_SSE_PROCESSING_EVENT)
 
     def postprocessor_hook(d: PostprocessorHookData) -> None:
         """Hook called by yt-dlp during post-processing."""
@@ -805,8 +1581,12 @@ def download_video_with_progress(url: str, format_id: str, audio_only: bool = Fa
             if 'Merge' in postprocessor:
                 message = 'Merging audio and video'
             elif 'ExtractAudio' in postprocessor:
-                # FFmpegExtractAudio - converting to audio format (MP3 in our config)
-                message = 'Converting to MP3'
+                # FFmpegExtractAudio - 'best' keeps the source codec, so
+                # nothing is converted
+                if AUDIO_FORMAT == 'best':
+                    message = 'Extracting audio'
+                else:
+                    message = f'Converting to {AUDIO_FORMAT.upper()}'
             elif 'FFmpeg' in postprocessor:
                 message = 'Processing audio'
             else:
@@ -815,143 +1595,105 @@ def download_video_with_progress(url: str, format_id: str, audio_only: bool = Fa
             # Track conversion start for elapsed time updates
             with state_lock:
                 conversion_state['active'] = True
-                conversion_state['start_time'] = time.time()
+                conversion_state['start_time'] = time.monotonic()
                 conversion_state['message'] = message
 
-            progress_queue.put({
+            publish(_sse_event({
                 'status': 'converting',
                 'percent': 100,
                 'message': f'{message}...',
                 'elapsed': 0,
-            })
+            }))
             logger.debug(f"Postprocessor started: {postprocessor}")
 
         elif status == 'finished':
             with state_lock:
                 conversion_state['active'] = False
-            progress_queue.put({
-                'status': 'processing',
-                'percent': 100,
-                'message': 'Finalizing...',
-            })
+            publish(_SSE_FINALIZING_EVENT)
             logger.debug(f"Postprocessor finished: {postprocessor}")
 
     def download_thread() -> None:
         """Run download in separate thread to not block SSE."""
-        nonlocal download_error
-
-        ydl_opts = {
-            **COMMON_OPTS,
-            'outtmpl': output_template,
-            'progress_hooks': [progress_hook],
-            'postprocessor_hooks': [postprocessor_hook],
-        }
+        ydl_opts = _YDL_OPTS_PROGRESS_DOWNLOAD.copy()
+        ydl_opts['outtmpl'] = output_template
+        ydl_opts['progress_hooks'] = [progress_hook]
+        ydl_opts['postprocessor_hooks'] = [postprocessor_hook]
         _configure_format_options(ydl_opts, format_id, audio_only)
 
         logger.debug(f"Starting download thread for {sanitize_for_log(url)}")
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.extract_info(url, download=True)
+                download_result['info'] = _extract_for_download(ydl, url)
             logger.debug(f"Download completed successfully for {sanitize_for_log(url)}")
         except Exception as e:
             if not cancelled.is_set():
                 download_error['error'] = str(e)
                 logger.warning(f"Download thread error: {e}")
+                cleanup_temp_dir(temp_dir)
         finally:
             download_complete.set()
+            # If the client is gone, nobody else will clean up (see below)
+            if cancelled.is_set():
+                cleanup_temp_dir(temp_dir)
+            publish(_PROGRESS_DONE)
             logger.debug("Download thread finished, signaled completion")
 
     # Start download in background thread (daemon for clean shutdown)
     thread = threading.Thread(target=download_thread, daemon=True)
     thread.start()
 
-    client_disconnected = False
+    finished = False
     try:
-        # Yield progress events
-        while not download_complete.is_set() or not progress_queue.empty():
+        # Yield progress events until the download thread signals completion
+        while True:
             try:
-                progress = progress_queue.get(timeout=PROGRESS_POLL_INTERVAL)
-                yield f"data: {json.dumps(progress)}\n\n"
-            except queue.Empty:
+                progress = await asyncio.wait_for(progress_queue.get(), timeout=PROGRESS_POLL_INTERVAL)
+            except asyncio.TimeoutError:
                 # Send updates to keep connection alive
-                if not download_complete.is_set():
-                    # Read shared state under lock
-                    with state_lock:
-                        is_converting = conversion_state['active']
-                        conv_start_time = conversion_state['start_time']
-                        conv_message = conversion_state['message']
-
-                    if is_converting:
-                        # During conversion, show elapsed time so user knows it's working
-                        elapsed = int(time.time() - conv_start_time)
-                        minutes, seconds = divmod(elapsed, 60)
-                        if minutes > 0:
-                            elapsed_str = f"{minutes}m {seconds}s"
-                        else:
-                            elapsed_str = f"{seconds}s"
-                        message = f"{conv_message}... ({elapsed_str})"
-                        event_data = {'status': 'converting', 'percent': 100, 'message': message, 'elapsed': elapsed}
-                        yield f"data: {json.dumps(event_data)}\n\n"
+                # Read shared state under lock
+                with state_lock:
+                    is_converting = conversion_state['active']
+                    conv_start_time = conversion_state['start_time']
+                    conv_message = conversion_state['message']
+
+                if is_converting:
+                    # During conversion, show elapsed time so user knows it's working
+                    elapsed = int(time.monotonic() - conv_start_time)
+                    minutes, seconds = divmod(elapsed, 60)
+                    if minutes > 0:
+                        elapsed_str = f"{minutes}m {seconds}s"
                     else:
-                        yield f"data: {json.dumps({'status': 'waiting'})}\n\n"
-    except GeneratorExit:
-        # Client disconnected - signal cancellation and cleanup
-        client_disconnected = True
-        cancelled.set()
-        logger.info(f"Client disconnected, cancelling download for {sanitize_for_log(url)}")
-    finally:
-        if client_disconnected:
-            # Wait briefly for thread to notice cancellation
-            thread.join(timeout=THREAD_JOIN_TIMEOUT)
-            cleanup_temp_dir(temp_dir)
-            return
-
-    thread.join()
+                        elapsed_str = f"{seconds}s"
+                    message = f"{conv_message}... ({elapsed_str})"
+                    yield _sse_event({'status': 'converting', 'percent': 100, 'message': message, 'elapsed': elapsed})
+                else:
+                    yield _SSE_WAITING_EVENT
+                continue
 
-    # Check for errors
+            if progress is _PROGRESS_DONE:
+                break
+            # Hooks publish ready-made frames (serialized on the download thread)
+            yield progress
+        finished = True
+    finally:
+        if not finished:
+            # Client disconnected (generator closed or task cancelled).
+            # Signal cancellation without awaiting: the thread notices on its
+            # next hook call. Whichever side observes the other's flag last
+            # removes the temp dir (a double cleanup is harmless).
+            cancelled.set()
+            logger.info(f"Client disconnected, cancelling download for {sanitize_for_log(url)}")
+            if download_complete.is_set():
+                defer_cleanup(partial(cleanup_temp_dir, temp_dir))
+
+    # Check for errors (the download thread already removed the temp dir)
     if download_error:
-        cleanup_temp_dir(temp_dir)
         # Sanitize error message to remove file paths and sensitive info
         safe_error = sanitize_error_for_user(download_error['error'])
-        yield f"data: {json.dumps({'status': 'error', 'message': safe_error})}\n\n"
+        yield _sse_event({'status': 'error', 'message': safe_error})
         return
 
-    # Find downloaded file using robust logic that skips intermediate files
-    downloaded_file = find_downloaded_file(temp_dir)
-
-    if not downloaded_file:
-        cleanup_temp_dir(temp_dir)
-        yield f"data: {json.dumps({'status': 'error', 'message': 'File not found'})}\n\n"
-        return
-
-    filename = os.path.basename(downloaded_file)
-    file_size = os.path.getsize(downloaded_file)
-
-    # Check file size limit (0 means no limit) - same check as download_video
-    if MAX_FILE_SIZE > 0 and file_size > MAX_FILE_SIZE:
-        cleanup_temp_dir(temp_dir)
-        size_mb = file_size / (1024 * 1024)
-        limit_mb = MAX_FILE_SIZE / (1024 * 1024)
-        yield f"data: {json.dumps({'status': 'error', 'message': f'File size ({size_mb:.1f} MB) exceeds maximum allowed ({limit_mb:.1f} MB)'})}\n\n"
-        return
-
-    ext = os.path.splitext(filename)[1].lower()
-    content_type = get_content_type(ext)
-
-    # Store download info and get ID
-    # Note: We preserve the original filename (including Unicode characters).
-    # The download endpoint will use sanitize_filename() to create both an
-    # ASCII fallback and a UTF-8 encoded version for Content-Disposition header.
-    download_id = store_completed_download({
-        'filename': filename,  # Preserve original Unicode filename
-        'file_size': file_size,
-        'content_type': content_type,
-        'temp_dir': temp_dir,
-        'file_path': downloaded_file,
-    })
-
-    # For the SSE response, provide an ASCII-safe version for display
-    # The actual download will use the original filename via the stored info
-    display_filename = filename.encode('ascii', 'replace').decode('ascii')
-
-    yield f"data: {json.dumps({'status': 'complete', 'download_id': download_id, 'filename': display_filename, 'file_size': file_size})}\n\n"
+    final_event = await loop.run_in_executor(
+        None, _finalize_progress_download, temp_dir, download_result.get('info')
+    )
+    yield _sse_event(final_event)
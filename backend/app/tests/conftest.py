@@ -5,6 +5,19 @@ from fastapi.testclient import TestClient
 from unittest.mock import MagicMock
 
 from app.main import app
+from app.services import downloader
+
+
+@pytest.fixture(autouse=True)
+def clear_video_info_cache():
+    """Prevent cached video info (and pooled yt-dlp instances) from leaking between tests."""
+    downloader._video_info_cache.clear()
+    downloader._raw_info_cache.clear()
+    downloader._info_ydl_pool.clear()
+    yield
+    downloader._video_info_cache.clear()
+    downloader._raw_info_cache.clear()
+    downloader._info_ydl_pool.clear()
 
 
 @pytest.fixture
@@ -106,6 +119,15 @@ def create_temp_file(temp_download_dir):
     return _create
 
 
+@pytest.fixture
+def create_download_file(temp_download_dir, create_temp_file):
+    """Factory fixture to create a TempDownloadFile as returned by download_video."""
+    def _create(content: bytes, filename: str = 'video.mp4'):
+        filepath = create_temp_file(filename, content)
+        return downloader.TempDownloadFile(filepath, temp_download_dir)
+    return _create
+
+
 @pytest.fixture
 def mock_ydl_class(mock_yt_dlp_info):
     """Create a mock YoutubeDL class."""
@@ -1,7 +1,19 @@
+import asyncio
+import os
+
 import pytest
 from unittest.mock import patch, MagicMock
 from app.models.schemas import VideoInfo, VideoFormat
 from app.exceptions import VideoExtractionError, DownloadError, NetworkError
+from app.config import CHUNK_SIZE, MAX_CONCURRENT_OPERATIONS
+from app.routes.download import TempDirFileResponse
+from app.services import downloader
+from app.services.downloader import store_completed_download
+
+
+def _wait_for_deferred_cleanup():
+    """Block until cleanups queued by finished responses have run."""
+    downloader._deferred_cleanup_executor.submit(lambda: None).result(timeout=5)
 
 
 class TestHealthEndpoints:
@@ -21,6 +33,14 @@ class TestHealthEndpoints:
         assert response.status_code == 200
         assert response.json()["status"] == "healthy"
 
+    def test_detailed_health_reports_download_temp_dir(self, client, temp_download_dir):
+        """Should report disk usage for the directory downloads are written to."""
+        with patch('app.main.get_temp_root', return_value=temp_download_dir):
+            response = client.get("/health/detailed")
+
+        assert response.status_code == 200
+        assert response.json()["disk"]["temp_dir"] == temp_download_dir
+
 
 class TestVideoInfoEndpoint:
     """Test POST /api/info endpoint."""
@@ -147,17 +167,13 @@ class TestDownloadEndpoint:
     """Test GET /api/download endpoint."""
 
     @patch('app.routes.download.download_video')
-    def test_successful_video_download(self, mock_download, client):
+    def test_successful_video_download(self, mock_download, client, create_download_file):
         """Should stream video file successfully."""
-        def fake_generator():
-            yield b"chunk1"
-            yield b"chunk2"
-
         mock_download.return_value = (
             "Test Video.mp4",
             "video/mp4",
             12,  # file_size
-            fake_generator()
+            create_download_file(b"chunk1chunk2")
         )
 
         response = client.get(
@@ -176,16 +192,13 @@ class TestDownloadEndpoint:
         assert response.content == b"chunk1chunk2"
 
     @patch('app.routes.download.download_video')
-    def test_successful_audio_download(self, mock_download, client):
+    def test_successful_audio_download(self, mock_download, client, create_download_file):
         """Should stream audio file with correct content type."""
-        def fake_generator():
-            yield b"audio_data"
-
         mock_download.return_value = (
             "Test Audio.mp3",
             "audio/mpeg",
             10,  # file_size
-            fake_generator()
+            create_download_file(b"audio_data", "Test Audio.mp3")
         )
 
         response = client.get(
@@ -206,12 +219,9 @@ class TestDownloadEndpoint:
         assert response.status_code == 422
 
     @patch('app.routes.download.download_video')
-    def test_default_parameters(self, mock_download, client):
+    def test_default_parameters(self, mock_download, client, create_download_file):
         """Should use default values for optional parameters."""
-        def fake_generator():
-            yield b"data"
-
-        mock_download.return_value = ("video.mp4", "video/mp4", 4, fake_generator())
+        mock_download.return_value = ("video.mp4", "video/mp4", 4, create_download_file(b"data"))
 
         response = client.get(
             "/api/download",
@@ -222,12 +232,9 @@ class TestDownloadEndpoint:
         mock_download.assert_called_once_with("https://test.com", "best", False)
 
     @patch('app.routes.download.download_video')
-    def test_url_passed_correctly(self, mock_download, client):
+    def test_url_passed_correctly(self, mock_download, client, create_download_file):
         """Should pass URL correctly to download function (FastAPI handles decoding)."""
-        def fake_generator():
-            yield b"data"
-
-        mock_download.return_value = ("video.mp4", "video/mp4", 4, fake_generator())
+        mock_download.return_value = ("video.mp4", "video/mp4", 4, create_download_file(b"data"))
 
         # Pass URL directly - FastAPI/test client handles encoding/decoding
         response = client.get(
@@ -245,16 +252,13 @@ class TestDownloadEndpoint:
         assert called_url == "https://www.youtube.com/watch?v=test"
 
     @patch('app.routes.download.download_video')
-    def test_unicode_filename_sanitization(self, mock_download, client):
+    def test_unicode_filename_sanitization(self, mock_download, client, create_download_file):
         """Should sanitize non-ASCII characters in filename."""
-        def fake_generator():
-            yield b"data"
-
         mock_download.return_value = (
             "Video con acentos y caracteres",
             "video/mp4",
             4,  # file_size
-            fake_generator()
+            create_download_file(b"data")
         )
 
         response = client.get(
@@ -268,16 +272,13 @@ class TestDownloadEndpoint:
         content_disp.encode('ascii')
 
     @patch('app.routes.download.download_video')
-    def test_fallback_filename_for_unicode_only(self, mock_download, client):
+    def test_fallback_filename_for_unicode_only(self, mock_download, client, create_download_file):
         """Should use fallback filename when original is only unicode."""
-        def fake_generator():
-            yield b"data"
-
         mock_download.return_value = (
             "\u4e2d\u6587\u6587\u4ef6",  # Chinese characters only
             "video/mp4",
             4,  # file_size
-            fake_generator()
+            create_download_file(b"data")
         )
 
         response = client.get(
@@ -316,13 +317,23 @@ class TestDownloadEndpoint:
         assert response.status_code == 503
         assert "detail" in response.json()
 
+    @patch('app.routes.download.has_free_temp_space', return_value=False)
     @patch('app.routes.download.download_video')
-    def test_cache_control_header(self, mock_download, client):
-        """Should include no-cache header."""
-        def fake_generator():
-            yield b"data"
+    def test_low_disk_space_returns_503(self, mock_download, mock_space, client):
+        """Should refuse to start a download when the temp disk is nearly full."""
+        response = client.get(
+            "/api/download",
+            params={"url": "https://test.com"}
+        )
+
+        assert response.status_code == 503
+        assert "disk space" in response.json()["detail"]
+        mock_download.assert_not_called()
 
-        mock_download.return_value = ("video.mp4", "video/mp4", 4, fake_generator())
+    @patch('app.routes.download.download_video')
+    def test_cache_control_header(self, mock_download, client, create_download_file):
+        """Should include no-cache header."""
+        mock_download.return_value = ("video.mp4", "video/mp4", 4, create_download_file(b"data"))
 
         response = client.get(
             "/api/download",
@@ -331,6 +342,113 @@ class TestDownloadEndpoint:
 
         assert response.headers["Cache-Control"] == "no-cache"
 
+    @patch('app.routes.download.download_video')
+    def test_file_backed_download_served_and_cleaned_up(self, mock_download, client,
+                                                       temp_download_dir, create_download_file):
+        """Should serve the downloaded file from disk and remove its temp dir."""
+        mock_download.return_value = (
+            "video.mp4",
+            "video/mp4",
+            11,
+            create_download_file(b"video bytes"),
+        )
+
+        response = client.get("/api/download", params={"url": "https://test.com"})
+
+        assert response.status_code == 200
+        assert response.content == b"video bytes"
+        assert response.headers["Content-Length"] == "11"
+        assert response.headers["content-type"] == "video/mp4"
+        _wait_for_deferred_cleanup()
+        assert not os.path.exists(temp_download_dir)
+
+
+class TestTempDirFileResponse:
+    """Test the file response used to serve downloads."""
+
+    def test_sends_file_in_chunk_size_pieces(self, temp_download_dir, create_download_file):
+        """Should send the body in CHUNK_SIZE pieces and then remove the temp dir."""
+        content = os.urandom(2 * CHUNK_SIZE + 100)
+        download_file = create_download_file(content)
+        response = TempDirFileResponse(download_file.path, cleanup=download_file.close)
+
+        messages = []
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "headers": []}
+        asyncio.run(response(scope, receive, send))
+
+        bodies = [m["body"] for m in messages if m["type"] == "http.response.body"]
+        assert [len(body) for body in bodies] == [CHUNK_SIZE, CHUNK_SIZE, 100]
+        assert b"".join(bodies) == content
+        _wait_for_deferred_cleanup()
+        assert not os.path.exists(temp_download_dir)
+
+
+class TestDownloadProgressEndpoint:
+    """Test GET /api/download/progress SSE endpoint."""
+
+    @patch('app.routes.download.download_video_with_progress')
+    def test_streams_events_and_releases_slot(self, mock_progress, client):
+        """Should stream SSE events and give the executor slot back afterwards."""
+        async def fake_events(url, format_id, audio_only):
+            yield 'data: {"status": "downloading"}\n\n'
+            yield 'data: {"status": "complete"}\n\n'
+
+        mock_progress.side_effect = fake_events
+
+        for _ in range(MAX_CONCURRENT_OPERATIONS + 1):
+            response = client.get("/api/download/progress", params={"url": "https://test.com"})
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            assert response.text == 'data: {"status": "downloading"}\n\ndata: {"status": "complete"}\n\n'
+
+
+class TestDownloadFileEndpoint:
+    """Test GET /api/download/file/{download_id} endpoint."""
+
+    def test_serves_stored_file_once(self, client, temp_download_dir, create_temp_file):
+        """Should serve a completed download and then forget it."""
+        filepath = create_temp_file("clip.mp4", b"stored bytes")
+        download_id = store_completed_download({
+            'file_path': filepath,
+            'temp_dir': temp_download_dir,
+            'filename': 'clip.mp4',
+            'file_size': 12,
+            'content_type': 'video/mp4',
+        })
+
+        response = client.get(f"/api/download/file/{download_id}")
+
+        assert response.status_code == 200
+        assert response.content == b"stored bytes"
+        assert response.headers["Content-Length"] == "12"
+        assert 'filename="clip.mp4"' in response.headers["Content-Disposition"]
+        _wait_for_deferred_cleanup()
+        assert not os.path.exists(temp_download_dir)
+
+        response = client.get(f"/api/download/file/{download_id}")
+        assert response.status_code == 404
+
+    def test_missing_file_returns_404(self, client, temp_download_dir):
+        """Should return 404 when the stored file no longer exists."""
+        download_id = store_completed_download({
+            'file_path': os.path.join(temp_download_dir, 'gone.mp4'),
+            'temp_dir': temp_download_dir,
+            'filename': 'gone.mp4',
+            'file_size': 1,
+            'content_type': 'video/mp4',
+        })
+
+        response = client.get(f"/api/download/file/{download_id}")
+
+        assert response.status_code == 404
+
 
 class TestTimeoutBehavior:
     """Test timeout handling for long-running operations."""
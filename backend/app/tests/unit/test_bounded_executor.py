@@ -0,0 +1,112 @@
+"""Tests for the BoundedExecutor used by the API routes."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.routes.download import BoundedExecutor, ServerAtCapacityError
+
+
+class TestBoundedExecutor:
+    """Test BoundedExecutor capacity limiting."""
+
+    def test_submit_returns_result(self):
+        """Should run the callable and return its result."""
+        executor = BoundedExecutor(max_workers=2, bound=1)
+        try:
+            assert executor.submit(lambda x: x * 2, 21).result(timeout=5) == 42
+        finally:
+            executor.shutdown(wait=True)
+
+    def test_rejects_when_at_capacity(self):
+        """Should raise ServerAtCapacityError when all slots are in use."""
+        executor = BoundedExecutor(max_workers=2, bound=1)
+        gate = threading.Event()
+        try:
+            future = executor.submit(gate.wait)
+            with pytest.raises(ServerAtCapacityError):
+                executor.submit(lambda: None)
+            gate.set()
+            future.result(timeout=5)
+        finally:
+            gate.set()
+            executor.shutdown(wait=True)
+
+    def test_slot_released_when_future_completes(self):
+        """Should free the slot once the submitted work finishes."""
+        executor = BoundedExecutor(max_workers=2, bound=1)
+        try:
+            executor.submit(lambda: None).result(timeout=5)
+            assert executor.submit(lambda: "ok").result(timeout=5) == "ok"
+        finally:
+            executor.shutdown(wait=True)
+
+    def test_slot_released_when_callable_raises(self):
+        """Should free the slot even if the callable raises."""
+        executor = BoundedExecutor(max_workers=2, bound=1)
+
+        def fail():
+            raise RuntimeError("boom")
+
+        try:
+            with pytest.raises(RuntimeError):
+                executor.submit(fail).result(timeout=5)
+            assert executor.submit(lambda: "ok").result(timeout=5) == "ok"
+        finally:
+            executor.shutdown(wait=True)
+
+    def test_acquire_slot_shares_capacity_with_submit(self):
+        """Slots acquired directly should count against submit capacity."""
+        executor = BoundedExecutor(max_workers=2, bound=1)
+        try:
+            executor.acquire_slot()
+            with pytest.raises(ServerAtCapacityError):
+                executor.submit(lambda: None)
+            executor.release_slot()
+            assert executor.submit(lambda: "ok").result(timeout=5) == "ok"
+        finally:
+            executor.shutdown(wait=True)
+
+    async def test_submit_async_is_awaitable(self):
+        """Should return an awaitable future bound to the running loop."""
+        executor = BoundedExecutor(max_workers=2, bound=1)
+        try:
+            assert await asyncio.wait_for(executor.submit_async(lambda: 7), timeout=5) == 7
+        finally:
+            executor.shutdown(wait=True)
+
+    def test_stats_track_running_queued_and_completed(self):
+        """Should report running, queued, and completed task counts."""
+        executor = BoundedExecutor(max_workers=1, bound=3)
+        gate = threading.Event()
+        started = threading.Event()
+
+        def blocker():
+            started.set()
+            gate.wait()
+
+        try:
+            first = executor.submit(blocker)
+            started.wait(timeout=5)
+            second = executor.submit(lambda: None)
+
+            stats = executor.stats()
+            assert stats["max_workers"] == 1
+            assert stats["max_concurrent_operations"] == 3
+            assert stats["tasks_total"] == 2
+            assert stats["tasks_running"] == 1
+            assert stats["tasks_queued"] == 1
+            assert stats["tasks_completed"] == 0
+
+            gate.set()
+            first.result(timeout=5)
+            second.result(timeout=5)
+
+            stats = executor.stats()
+            assert stats["tasks_running"] == 0
+            assert stats["tasks_queued"] == 0
+            assert stats["tasks_completed"] == 2
+        finally:
+            gate.set()
+            executor.shutdown(wait=True)
@@ -1,9 +1,24 @@
-import pytest
+import gc
+import http.cookiejar
+import json
 import os
+import threading
+
+import pytest
+import yt_dlp
 from unittest.mock import patch, MagicMock
-from app.services.downloader import get_video_info, download_video
+from app.services import downloader
+from app.services.downloader import (
+    get_video_info,
+    download_video,
+    download_video_with_progress,
+    store_completed_download,
+    remove_completed_download,
+    cleanup_temp_dir,
+    get_extension,
+)
 from app.models.schemas import VideoInfo
-from app.exceptions import VideoExtractionError, DownloadError
+from app.exceptions import VideoExtractionError, DownloadError, NetworkError
 
 
 class TestGetVideoInfo:
@@ -45,6 +60,22 @@ class TestGetVideoInfo:
         with pytest.raises(Exception, match="Network error"):
             get_video_info("https://www.youtube.com/watch?v=test")
 
+    @pytest.mark.parametrize('message, expected', [
+        ("ERROR: Unsupported URL: https://example.com", VideoExtractionError),
+        ("ERROR: Connection reset by peer", NetworkError),
+        ("ERROR: Read Timed Out", NetworkError),
+        ("ERROR: Video unavailable", VideoExtractionError),
+    ])
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_download_error_classification(self, mock_ydl_class, message, expected):
+        """Should map yt-dlp DownloadError messages to the matching error type."""
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.side_effect = yt_dlp.utils.DownloadError(message)
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        with pytest.raises(expected):
+            get_video_info("https://www.youtube.com/watch?v=test")
+
     @patch('app.services.downloader.yt_dlp.YoutubeDL')
     def test_formats_sorted_by_quality(self, mock_ydl_class, mock_yt_dlp_info):
         """Should sort video formats by resolution (highest first)."""
@@ -90,6 +121,194 @@ class TestGetVideoInfo:
 
         assert bitrates == sorted(bitrates, reverse=True)
 
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_video_size_estimate_uses_largest_stream_per_height(self, mock_ydl_class, mock_yt_dlp_info):
+        """Should estimate size as largest video at the height plus best audio."""
+        mock_yt_dlp_info['formats'].append({
+            'format_id': '299',
+            'ext': 'webm',
+            'height': 1080,
+            'vcodec': 'vp9',
+            'acodec': 'none',
+            'filesize_approx': 70000000,
+        })
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.return_value = mock_yt_dlp_info
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        result = get_video_info("https://test.com")
+
+        sizes = {f.resolution: f.filesize for f in result.video_formats}
+        assert sizes == {'1080p': 75000000, '720p': 35000000, '480p': 20000000}
+
+
+class TestVideoInfoCache:
+    """Test per-URL caching of get_video_info."""
+
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_repeated_lookup_served_from_cache(self, mock_ydl_class, mock_yt_dlp_info):
+        """Should only run yt-dlp once for repeated lookups of the same URL."""
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.return_value = mock_yt_dlp_info
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        first = get_video_info("https://test.com/cached")
+        second = get_video_info("https://test.com/cached")
+
+        assert first == second
+        assert mock_ydl.extract_info.call_count == 1
+
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_errors_are_not_cached(self, mock_ydl_class, mock_yt_dlp_info):
+        """Should retry extraction after a failed lookup."""
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.side_effect = [None, mock_yt_dlp_info]
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        with pytest.raises(VideoExtractionError):
+            get_video_info("https://test.com/flaky")
+        assert get_video_info("https://test.com/flaky").title == "Test Video Title"
+
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_invalidate_forces_fresh_extraction(self, mock_ydl_class, mock_yt_dlp_info):
+        """Should extract again after the URL's entry is invalidated."""
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.return_value = mock_yt_dlp_info
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        get_video_info("https://test.com/stale")
+        assert downloader.invalidate_video_info("https://test.com/stale") is True
+        assert downloader.invalidate_video_info("https://test.com/stale") is False
+        get_video_info("https://test.com/stale")
+
+        assert mock_ydl.extract_info.call_count == 2
+
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_tracking_params_share_cache_entry(self, mock_ydl_class, mock_yt_dlp_info):
+        """Should treat URLs differing only in tracking parameters as one entry."""
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.return_value = mock_yt_dlp_info
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        get_video_info("https://test.com/watch?v=abc")
+        get_video_info("https://test.com/watch?v=abc&fbclid=XyZ&utm_source=share")
+        get_video_info("https://test.com/watch?v=other")
+
+        assert mock_ydl.extract_info.call_count == 2
+
+    @pytest.mark.parametrize('url, expected', [
+        ("https://www.youtube.com/watch?v=abc&si=x&pp=y&feature=share", "https://www.youtube.com/watch?v=abc"),
+        ("https://youtu.be/abc?si=x", "https://youtu.be/abc"),
+        ("https://m.youtube.com/watch?v=abc&utm_medium=x", "https://m.youtube.com/watch?v=abc"),
+        # si/pp/feature may select content on other sites
+        ("https://example.com/video?pp=2&feature=x&si=1", "https://example.com/video?pp=2&feature=x&si=1"),
+        ("https://notyoutube.com/v?pp=2", "https://notyoutube.com/v?pp=2"),
+    ])
+    def test_cache_key_strips_tracking_params(self, url, expected):
+        """Should strip YouTube-only tracking params only on YouTube hosts."""
+        assert downloader._info_cache_key(url) == expected
+
+    @patch('app.services.downloader.INFO_CACHE_TTL_SECONDS', 0)
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_cache_disabled(self, mock_ydl_class, mock_yt_dlp_info):
+        """Should extract every time when the TTL is 0."""
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.return_value = mock_yt_dlp_info
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        get_video_info("https://test.com/nocache")
+        get_video_info("https://test.com/nocache")
+
+        assert mock_ydl.extract_info.call_count == 2
+
+    def test_concurrent_lookups_share_one_extraction(self, mock_yt_dlp_info):
+        """Concurrent lookups for the same URL should wait for a single extraction."""
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_extract(url):
+            calls.append(url)
+            started.set()
+            release.wait(timeout=5)
+            return VideoInfo(title="Shared")
+
+        with patch.object(downloader, '_extract_video_info', side_effect=slow_extract):
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(get_video_info("https://test.com/shared")))
+                for _ in range(3)
+            ]
+            threads[0].start()
+            started.wait(timeout=5)
+            for t in threads[1:]:
+                t.start()
+            release.set()
+            for t in threads:
+                t.join(timeout=5)
+
+        assert calls == ["https://test.com/shared"]
+        assert [r.title for r in results] == ["Shared"] * 3
+
+
+class TestYoutubeDLPool:
+    """Test reuse of YoutubeDL instances for info extraction."""
+
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_instance_reused_across_borrows(self, mock_ydl_class):
+        """Should construct one instance and hand it out again after return."""
+        pool = downloader._YoutubeDLPool({'quiet': True}, max_idle=2)
+
+        with pool.borrow() as first:
+            pass
+        with pool.borrow() as second:
+            pass
+
+        assert first is second
+        assert mock_ydl_class.call_count == 1
+        pool.clear()
+        mock_ydl_class.return_value.__exit__.assert_called_once()
+
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_instance_discarded_after_error(self, mock_ydl_class):
+        """Should close an instance whose use raised instead of pooling it."""
+        pool = downloader._YoutubeDLPool({'quiet': True}, max_idle=2)
+
+        with pytest.raises(RuntimeError):
+            with pool.borrow():
+                raise RuntimeError("boom")
+        with pool.borrow():
+            pass
+
+        assert mock_ydl_class.call_count == 2
+        assert mock_ydl_class.return_value.__exit__.call_count == 1
+
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_idle_instances_capped(self, mock_ydl_class):
+        """Should close instances returned while the pool is already full."""
+        mock_ydl_class.side_effect = lambda opts: MagicMock()
+        pool = downloader._YoutubeDLPool({'quiet': True}, max_idle=1)
+
+        with pool.borrow() as first, pool.borrow() as second:
+            assert first is not second
+
+        assert len(pool._idle) == 1
+        pool.clear()
+
+    def test_returned_instance_has_no_cookies(self):
+        """Should not carry cookies set for one request over to the next borrower."""
+        pool = downloader._YoutubeDLPool({'quiet': True}, max_idle=1)
+
+        with pool.borrow() as first:
+            first.cookiejar.set_cookie(http.cookiejar.Cookie(
+                0, 'session', 'user-a', None, False, '.example.com', True, True, '/', True,
+                False, None, False, None, None, {}))
+            assert len(first.cookiejar) == 1
+        with pool.borrow() as second:
+            assert second is first
+            assert len(second.cookiejar) == 0
+        pool.clear()
+
 
 class TestDownloadVideo:
     """Test download_video function."""
@@ -98,7 +317,7 @@ class TestDownloadVideo:
     @patch('app.services.downloader.tempfile.mkdtemp')
     def test_successful_video_download(self, mock_mkdtemp, mock_ydl_class,
                                         temp_download_dir, create_temp_file):
-        """Should download video and return stream."""
+        """Should download video and return the temp file."""
         mock_mkdtemp.return_value = temp_download_dir
         create_temp_file("Test Video.mp4", b"video content" * 100)
 
@@ -106,17 +325,94 @@ class TestDownloadVideo:
         mock_ydl.extract_info.return_value = {'title': 'Test Video'}
         mock_ydl_class.return_value.__enter__.return_value = mock_ydl
 
-        filename, content_type, file_size, stream = download_video(
+        filename, content_type, file_size, file = download_video(
             "https://test.com", "137", audio_only=False
         )
 
         assert filename == "Test Video.mp4"
         assert content_type == "video/mp4"
         assert file_size > 0
-        # Consume stream
-        chunks = list(stream)
-        assert len(chunks) > 0
+        assert os.path.getsize(file.path) == file_size
+        file.close()
 
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    @patch('app.services.downloader.tempfile.mkdtemp')
+    def test_download_reuses_cached_metadata(self, mock_mkdtemp, mock_ydl_class,
+                                             temp_download_dir, create_temp_file, mock_yt_dlp_info):
+        """Should skip re-extraction when the URL's info was just fetched."""
+        mock_mkdtemp.return_value = temp_download_dir
+        create_temp_file("Test Video.mp4", b"video content")
+
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.return_value = mock_yt_dlp_info
+        mock_ydl.process_ie_result.return_value = {'title': 'Test Video'}
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        get_video_info("https://test.com/reuse")
+        mock_ydl.extract_info.reset_mock()
+
+        result = download_video("https://test.com/reuse", "137")
+        result.file.close()
+
+        mock_ydl.extract_info.assert_not_called()
+        mock_ydl.process_ie_result.assert_called_once()
+        assert mock_ydl.process_ie_result.call_args.kwargs == {'download': True}
+
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    @patch('app.services.downloader.tempfile.mkdtemp')
+    def test_stale_cached_metadata_falls_back_to_extraction(self, mock_mkdtemp, mock_ydl_class,
+                                                            temp_download_dir, create_temp_file,
+                                                            mock_yt_dlp_info):
+        """Should re-extract when replaying cached metadata fails."""
+        mock_mkdtemp.return_value = temp_download_dir
+        create_temp_file("Test Video.mp4", b"video content")
+
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.return_value = mock_yt_dlp_info
+        mock_ydl.process_ie_result.side_effect = yt_dlp.utils.DownloadError("HTTP Error 403: Forbidden")
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        get_video_info("https://test.com/stale-formats")
+        mock_ydl.extract_info.reset_mock()
+
+        result = download_video("https://test.com/stale-formats", "137")
+        result.file.close()
+
+        mock_ydl.process_ie_result.assert_called_once()
+        mock_ydl.extract_info.assert_called_once_with("https://test.com/stale-formats", download=True)
+        assert downloader._raw_info_cache.get("https://test.com/stale-formats") is None
+
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_playlist_metadata_not_cached_for_download(self, mock_ydl_class, mock_yt_dlp_info):
+        """Should not keep playlist results for reuse (their entries aren't preserved)."""
+        mock_yt_dlp_info['_type'] = 'playlist'
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.return_value = mock_yt_dlp_info
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        get_video_info("https://test.com/watch?v=a&list=b")
+
+        assert downloader._raw_info_cache.get("https://test.com/watch?v=a&list=b") is None
+
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    def test_cached_metadata_drops_unused_fields(self, mock_ydl_class, mock_yt_dlp_info):
+        """Should not keep captions and similar unused fields in the raw info cache."""
+        mock_yt_dlp_info['automatic_captions'] = {'en': [{'ext': 'vtt', 'url': 'https://x'}]}
+        mock_yt_dlp_info['subtitles'] = {}
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.return_value = mock_yt_dlp_info
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+        mock_ydl_class.sanitize_info.side_effect = lambda info, **kwargs: dict(info)
+
+        get_video_info("https://test.com/pruned")
+
+        cached = downloader._raw_info_cache.get("https://test.com/pruned")
+        assert cached['title'] == "Test Video Title"
+        assert 'automatic_captions' not in cached
+        assert 'subtitles' not in cached
+        assert len(cached['formats']) == len(mock_yt_dlp_info['formats'])
+
+    @patch('app.services.downloader.AUDIO_FORMAT', 'mp3')
     @patch('app.services.downloader.yt_dlp.YoutubeDL')
     @patch('app.services.downloader.tempfile.mkdtemp')
     def test_audio_download_sets_postprocessors(self, mock_mkdtemp, mock_ydl_class,
@@ -136,6 +432,62 @@ class TestDownloadVideo:
         assert 'postprocessors' in call_args
         assert call_args['postprocessors'][0]['key'] == 'FFmpegExtractAudio'
         assert call_args['postprocessors'][0]['preferredcodec'] == 'mp3'
+        assert call_args['postprocessors'][0]['preferredquality'] == '320'
+        assert call_args['format'] == 'bestaudio[acodec=mp3]/bestaudio/best'
+
+    @patch('app.services.downloader.AUDIO_FORMAT', 'best')
+    @patch('app.services.downloader.yt_dlp.YoutubeDL')
+    @patch('app.services.downloader.tempfile.mkdtemp')
+    def test_audio_download_keeps_source_codec(self, mock_mkdtemp, mock_ydl_class,
+                                                temp_download_dir, create_temp_file):
+        """Should keep the source codec (no re-encode) when AUDIO_FORMAT is 'best'."""
+        mock_mkdtemp.return_value = temp_download_dir
+        create_temp_file("Test Audio.m4a", b"audio content")
+
+        mock_ydl = MagicMock()
+        mock_ydl.extract_info.return_value = {'title': 'Test Audio'}
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        result = download_video("https://test.com", "140", audio_only=True)
+
+        call_args = mock_ydl_class.call_args[0][0]
+        assert call_args['postprocessors'] == [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'best'}]
+        assert call_args['format'] == 'bestaudio/best'
+        assert result.content_type == 'audio/mp4'
+        result.file.close()
+
+    @pytest.mark.parametrize('audio_format, source_id, source_codec, ffmpeg_runs', [
+        # Already an .m4a file: nothing to do at all
+        ('m4a', '140', 'aac', False),
+        # Opus in .webm: rewritten to .opus with a stream copy
+        ('opus', '251', 'opus', True),
+    ])
+    def test_audio_format_prefers_source_it_can_copy(self, audio_format, source_id, source_codec, ffmpeg_runs):
+        """Should pick a source already in AUDIO_FORMAT, which FFmpegExtractAudio copies."""
+        formats = [
+            {'format_id': '251', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus', 'abr': 160, 'url': 'https://x/251'},
+            {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 128, 'url': 'https://x/140'},
+        ]
+        ydl_opts = {'quiet': True}
+        with patch('app.services.downloader.AUDIO_FORMAT', audio_format):
+            downloader._configure_format_options(ydl_opts, 'best', audio_only=True)
+
+        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+            selector = ydl.build_format_selector(ydl_opts['format'])
+            selected = list(selector({'formats': formats, 'has_merged_format': False, 'incomplete_formats': False}))
+            assert [f['format_id'] for f in selected] == [source_id]
+
+            # The postprocessor never re-encodes a source that already matches
+            postprocessor = yt_dlp.postprocessor.FFmpegExtractAudioPP(
+                ydl, preferredcodec=ydl_opts['postprocessors'][0]['preferredcodec'])
+            with patch.object(postprocessor, 'get_audio_codec', return_value=source_codec), \
+                    patch.object(postprocessor, 'run_ffmpeg') as mock_run_ffmpeg, \
+                    patch('yt_dlp.postprocessor.ffmpeg.os.replace'):
+                postprocessor.run({'filepath': f'/nonexistent/a.{selected[0]["ext"]}', 'ext': selected[0]['ext']})
+            if ffmpeg_runs:
+                assert mock_run_ffmpeg.call_args.args[2] == 'copy'
+            else:
+                mock_run_ffmpeg.assert_not_called()
 
     @patch('app.services.downloader.yt_dlp.YoutubeDL')
     @patch('app.services.downloader.tempfile.mkdtemp')
@@ -181,8 +533,8 @@ class TestDownloadVideo:
                 mock_ydl.extract_info.return_value = {'title': 'Test'}
                 mock_ydl_class.return_value.__enter__.return_value = mock_ydl
 
-                _, content_type, _, stream = download_video("https://test.com", "best")
-                list(stream)
+                _, content_type, _, file = download_video("https://test.com", "best")
+                file.close()
 
                 assert content_type == "video/mp4"
 
@@ -201,8 +553,8 @@ class TestDownloadVideo:
                 mock_ydl.extract_info.return_value = {'title': 'Test'}
                 mock_ydl_class.return_value.__enter__.return_value = mock_ydl
 
-                _, content_type, _, stream = download_video("https://test.com", "best")
-                list(stream)
+                _, content_type, _, file = download_video("https://test.com", "best")
+                file.close()
 
                 assert content_type == "audio/mpeg"
 
@@ -221,16 +573,16 @@ class TestDownloadVideo:
                 mock_ydl.extract_info.return_value = {'title': 'Test'}
                 mock_ydl_class.return_value.__enter__.return_value = mock_ydl
 
-                _, content_type, _, stream = download_video("https://test.com", "best")
-                list(stream)
+                _, content_type, _, file = download_video("https://test.com", "best")
+                file.close()
 
                 assert content_type == "application/octet-stream"
 
     @patch('app.services.downloader.yt_dlp.YoutubeDL')
     @patch('app.services.downloader.tempfile.mkdtemp')
-    def test_temp_file_cleanup_after_streaming(self, mock_mkdtemp, mock_ydl_class,
-                                                temp_download_dir, create_temp_file):
-        """Should cleanup temp files after streaming completes."""
+    def test_close_cleans_up_temp_dir(self, mock_mkdtemp, mock_ydl_class,
+                                      temp_download_dir, create_temp_file):
+        """Should cleanup temp files when the downloaded file is closed."""
         mock_mkdtemp.return_value = temp_download_dir
         filepath = create_temp_file("test.mp4", b"content")
 
@@ -238,13 +590,483 @@ class TestDownloadVideo:
         mock_ydl.extract_info.return_value = {'title': 'Test'}
         mock_ydl_class.return_value.__enter__.return_value = mock_ydl
 
-        _, _, _, stream = download_video("https://test.com", "best")
+        _, _, _, file = download_video("https://test.com", "best")
 
-        # File should exist before consuming stream
+        # File should exist until it is closed
         assert os.path.exists(filepath)
 
-        # Consume stream
-        list(stream)
+        file.close()
+        file.close()  # idempotent
 
-        # File should be deleted after streaming
         assert not os.path.exists(filepath)
+        assert not os.path.exists(temp_download_dir)
+
+    def test_dropped_file_cleans_up(self, temp_download_dir, create_temp_file):
+        """Should cleanup temp files when a file is dropped without being closed."""
+        filepath = create_temp_file("test.mp4", b"content")
+        file = downloader.TempDownloadFile(filepath, temp_download_dir)
+
+        gc.disable()
+        try:
+            # Reference counting alone must trigger cleanup (no cyclic GC)
+            del file
+            assert not os.path.exists(temp_download_dir)
+        finally:
+            gc.enable()
+
+
+class TestHasFreeTempSpace:
+    """Tests for the temp filesystem free-space check."""
+
+    def test_below_threshold(self):
+        """Test that free space under the minimum is reported as full."""
+        usage = MagicMock(free=10)
+        with patch.object(downloader, 'MIN_FREE_TEMP_SPACE', 100), \
+                patch.object(downloader.shutil, 'disk_usage', return_value=usage):
+            assert downloader.has_free_temp_space() is False
+
+    def test_disabled_or_unknown_allows_download(self):
+        """Test that a disabled or failing check does not block downloads."""
+        with patch.object(downloader, 'MIN_FREE_TEMP_SPACE', 0):
+            assert downloader.has_free_temp_space() is True
+        with patch.object(downloader, 'MIN_FREE_TEMP_SPACE', 100), \
+                patch.object(downloader.shutil, 'disk_usage', side_effect=OSError("boom")):
+            assert downloader.has_free_temp_space() is True
+
+
+class TestGetExtension:
+    """Tests for get_extension."""
+
+    @pytest.mark.parametrize('filename', [
+        'video.mp4', 'Video.MP4', 'my.video.webm', 'noext', '.hidden', 'trailing.', 'a.b.PART',
+    ])
+    def test_matches_splitext(self, filename):
+        """Test that results match os.path.splitext(...)[1].lower()."""
+        assert get_extension(filename) == os.path.splitext(filename)[1].lower()
+
+
+class TestRetryBackoff:
+    """Tests for the yt-dlp retry sleep function."""
+
+    def test_grows_exponentially_and_is_capped(self):
+        """Test that delays increase with each attempt and never exceed 30s."""
+        delays = [downloader._retry_backoff(n=n) for n in range(20)]
+        assert delays[0] == 0.25
+        assert delays[:5] == sorted(delays[:5])
+        assert max(delays) == 30.0
+
+    @pytest.mark.parametrize('kind', ['http', 'fragment', 'file_access'])
+    def test_called_the_way_ytdlp_calls_it(self, kind):
+        """Test that yt-dlp's RetryManager can call every configured sleep function."""
+        sleep_func = downloader.COMMON_OPTS['retry_sleep_functions'][kind]
+        info = MagicMock()
+
+        with patch('yt_dlp.utils._utils.time.sleep') as mock_sleep:
+            yt_dlp.utils.RetryManager.report_retry(
+                Exception("transient"), 1, 5, sleep_func=sleep_func, info=info, warn=MagicMock()
+            )
+
+        mock_sleep.assert_called_once_with(sleep_func(n=0))
+
+
+class TestCleanupTempDir:
+    """Tests for cleanup_temp_dir."""
+
+    def test_removes_directory_and_contents(self, temp_download_dir, create_temp_file):
+        """Test that the directory and its files are removed."""
+        create_temp_file('video.mp4')
+
+        cleanup_temp_dir(temp_download_dir)
+
+        assert not os.path.exists(temp_download_dir)
+
+    def test_missing_directory_is_ignored(self, temp_download_dir):
+        """Test that a directory that is already gone is not an error."""
+        missing = os.path.join(temp_download_dir, 'gone')
+
+        with patch.object(downloader.logger, 'warning') as mock_warning:
+            cleanup_temp_dir(missing)
+
+        mock_warning.assert_not_called()
+
+    def test_removes_several_directories(self, temp_download_dir):
+        """Test that a batch of directories is removed in parallel."""
+        dirs = []
+        for i in range(5):
+            path = os.path.join(temp_download_dir, f'dir{i}')
+            os.makedirs(os.path.join(path, 'nested'))
+            dirs.append(path)
+
+        downloader._cleanup_temp_dirs(dirs)
+
+        assert not any(os.path.exists(path) for path in dirs)
+
+
+class TestDeferCleanup:
+    """Tests for defer_cleanup."""
+
+    def test_runs_callable_in_background(self):
+        """Test that the callable runs on the deferred cleanup thread."""
+        ran_on = []
+        downloader.defer_cleanup(lambda: ran_on.append(threading.current_thread().name))
+        downloader._deferred_cleanup_executor.submit(lambda: None).result(timeout=5)
+        assert ran_on and ran_on[0].startswith("catloader-deferred-cleanup")
+
+    def test_failure_is_logged_not_raised(self):
+        """Test that a failing cleanup doesn't break later ones."""
+        ran = threading.Event()
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with patch.object(downloader.logger, 'exception') as mock_log:
+            downloader.defer_cleanup(fail)
+            downloader.defer_cleanup(ran.set)
+            assert ran.wait(timeout=5)
+        mock_log.assert_called_once()
+
+
+class TestCleanupThread:
+    """Tests for the background cleanup thread."""
+
+    def test_started_once_on_first_use(self):
+        """Test that the thread is started on first use and only once."""
+        with patch.object(downloader, '_cleanup_thread', None), \
+                patch.object(downloader, '_background_cleanup'), \
+                patch.object(downloader.threading, 'Thread') as mock_thread:
+            downloader._ensure_cleanup_thread()
+            downloader._ensure_cleanup_thread()
+
+        mock_thread.assert_called_once()
+        mock_thread.return_value.start.assert_called_once()
+
+    def test_interval_backs_off_when_idle(self):
+        """Test that empty sweeps lengthen the interval up to the ceiling."""
+        interval = downloader._CLEANUP_INTERVAL
+        for _ in range(10):
+            interval = downloader._next_cleanup_interval(interval, 0)
+
+        assert interval == downloader._CLEANUP_INTERVAL_MAX
+        assert interval <= max(downloader._CLEANUP_INTERVAL, downloader.DOWNLOAD_EXPIRY_SECONDS)
+
+    def test_interval_shrinks_while_busy(self):
+        """Test that productive sweeps shorten the interval down to the floor."""
+        interval = downloader._CLEANUP_INTERVAL
+        for _ in range(10):
+            interval = downloader._next_cleanup_interval(interval, 3)
+
+        assert interval == downloader._CLEANUP_INTERVAL_MIN
+
+
+def _expired_timestamp():
+    """created_at value (time.monotonic() based) that is already past expiry."""
+    return downloader.time.monotonic() - downloader.DOWNLOAD_EXPIRY_SECONDS - 1
+
+
+class TestCompletedDownloadsStore:
+    """Test the sharded in-memory completed downloads store."""
+
+    @pytest.fixture(autouse=True)
+    def clear_store(self, monkeypatch):
+        """Start and end each test with an empty store."""
+        for shard in downloader._shards:
+            shard.entries.clear()
+        monkeypatch.setattr(downloader, '_download_count', downloader._DownloadCounter())
+        yield
+        for shard in downloader._shards:
+            shard.entries.clear()
+
+    @staticmethod
+    def _put(shard, key: str, created_at: float) -> None:
+        """Insert an entry directly, keeping the global count in step."""
+        shard.entries[key] = {'temp_dir': f'/nonexistent/{key}', 'created_at': created_at}
+        downloader._download_count.add(1)
+
+    @staticmethod
+    def _file_info(temp_dir: str) -> dict:
+        return {
+            'file_path': os.path.join(temp_dir, 'video.mp4'),
+            'temp_dir': temp_dir,
+            'filename': 'video.mp4',
+            'file_size': 1,
+            'content_type': 'video/mp4',
+        }
+
+    def test_store_and_remove(self):
+        """Should return stored info once, then None."""
+        download_id = store_completed_download(self._file_info('/nonexistent/a'))
+
+        assert downloader._download_count.value == 1
+
+        info = remove_completed_download(download_id)
+        assert info['filename'] == 'video.mp4'
+        assert 'created_at' in info
+        assert remove_completed_download(download_id) is None
+        assert downloader._download_count.value == 0
+
+    def test_only_required_fields_stored(self):
+        """Should copy only the required fields, not extra caller data."""
+        file_info = {**self._file_info('/nonexistent/a'), 'info': {'formats': ['large']}}
+
+        download_id = store_completed_download(file_info)
+        file_info['filename'] = 'mutated.mp4'
+
+        info = remove_completed_download(download_id)
+        assert 'info' not in info
+        assert info['filename'] == 'video.mp4'
+
+    def test_missing_fields_rejected(self):
+        """Should raise ValueError when required fields are missing."""
+        with pytest.raises(ValueError, match="Missing required fields"):
+            store_completed_download({'filename': 'video.mp4'})
+
+    def test_evicts_oldest_across_shards_when_full(self):
+        """Should evict the globally oldest entry once the store reaches its limit."""
+        first_shard, second_shard = downloader._shards[0], downloader._shards[1]
+        with patch.object(downloader, 'MAX_COMPLETED_DOWNLOADS', 2), \
+                patch.object(downloader, '_shard_for', side_effect=[first_shard, second_shard, second_shard]), \
+                patch.object(downloader, 'cleanup_temp_dir') as mock_cleanup:
+            first = store_completed_download(self._file_info('/nonexistent/1'))
+            second = store_completed_download(self._file_info('/nonexistent/2'))
+            third = store_completed_download(self._file_info('/nonexistent/3'))
+
+        assert first not in first_shard.entries
+        assert list(second_shard.entries) == [second, third]
+        mock_cleanup.assert_called_once_with('/nonexistent/1')
+
+    def test_limit_is_global_not_per_shard(self):
+        """Should not evict anything while the store is under MAX_COMPLETED_DOWNLOADS."""
+        shard = downloader._shards[0]
+        with patch.object(downloader, 'MAX_COMPLETED_DOWNLOADS', 16), \
+                patch.object(downloader, '_shard_for', return_value=shard), \
+                patch.object(downloader, 'cleanup_temp_dir') as mock_cleanup:
+            ids = [store_completed_download(self._file_info(f'/nonexistent/{i}')) for i in range(16)]
+
+        # All 16 land in one shard, yet none is evicted
+        assert list(shard.entries) == ids
+        mock_cleanup.assert_not_called()
+
+    def test_store_below_limit_skips_capacity_lock(self):
+        """Should only take the global capacity lock once the store is full."""
+        capacity_lock = MagicMock()
+        with patch.object(downloader, 'MAX_COMPLETED_DOWNLOADS', 2), \
+                patch.object(downloader, '_store_capacity_lock', capacity_lock), \
+                patch.object(downloader, 'cleanup_temp_dir'):
+            store_completed_download(self._file_info('/nonexistent/1'))
+            store_completed_download(self._file_info('/nonexistent/2'))
+            capacity_lock.__enter__.assert_not_called()
+
+            store_completed_download(self._file_info('/nonexistent/3'))
+            capacity_lock.__enter__.assert_called_once()
+
+        assert downloader._download_count.value == 2
+
+    def test_expired_entries_collected(self):
+        """Should remove only expired entries from the front of a shard."""
+        shard = downloader._shards[0]
+        self._put(shard, 'old', _expired_timestamp())
+        self._put(shard, 'new', downloader.time.monotonic())
+
+        with shard.lock:
+            dirs = downloader._collect_expired_downloads_locked(shard)
+
+        assert dirs == ['/nonexistent/old']
+        assert list(shard.entries) == ['new']
+        assert downloader._download_count.value == 1
+
+    def test_expiry_sweep_stops_at_first_live_entry(self):
+        """Sweep should only visit the expired prefix (insertion order is age order)."""
+        shard = downloader._shards[0]
+        self._put(shard, 'live', downloader.time.monotonic())
+        # Entries behind a live entry are never examined, even if stale
+        self._put(shard, 'tail', _expired_timestamp())
+
+        with shard.lock:
+            dirs = downloader._collect_expired_downloads_locked(shard)
+
+        assert dirs == []
+        assert list(shard.entries) == ['live', 'tail']
+
+    def test_cleanup_sweeps_all_shards(self):
+        """Background sweep should clean expired entries in every shard."""
+        for index, shard in enumerate(downloader._shards):
+            self._put(shard, f'old{index}', _expired_timestamp())
+
+        with patch.object(downloader, 'cleanup_temp_dir') as mock_cleanup:
+            downloader._cleanup_expired_downloads()
+
+        assert mock_cleanup.call_count == downloader._NUM_SHARDS
+        assert all(not shard.entries for shard in downloader._shards)
+        assert downloader._download_count.value == 0
+
+    def test_store_sweeps_expired_at_most_once_per_interval(self):
+        """Store should only sweep a shard when the sweep interval has elapsed."""
+        shard = downloader._shards[0]
+        with patch.object(downloader, '_shard_for', return_value=shard), \
+                patch.object(downloader, 'cleanup_temp_dir') as mock_cleanup:
+            shard.last_sweep = downloader.time.monotonic()
+            self._put(shard, 'stale', _expired_timestamp())
+            store_completed_download(self._file_info('/nonexistent/a'))
+            assert 'stale' in shard.entries
+
+            shard.last_sweep = 0.0
+            store_completed_download(self._file_info('/nonexistent/b'))
+            assert 'stale' not in shard.entries
+            mock_cleanup.assert_called_once_with('/nonexistent/stale')
+
+
+class TestSseProgressEvent:
+    """Tests for the templated 'downloading' SSE frame."""
+
+    @pytest.mark.parametrize('speed,eta', [(1234.5, 7), (None, None), (0, 0)])
+    def test_matches_json_dumps(self, speed, eta):
+        """Test that the template renders exactly what json.dumps would."""
+        expected = {
+            'status': 'downloading', 'percent': 42.5, 'downloaded': 425, 'total': 1000,
+            'speed': speed, 'eta': eta, 'phase': 'video',
+        }
+
+        frame = downloader._sse_progress_event(42.5, 425, 1000, speed, eta, 'video')
+
+        assert frame == f"data: {json.dumps(expected)}\n\n"
+
+    @pytest.mark.parametrize('value', [float('inf'), float('-inf'), float('nan')])
+    def test_non_finite_values_sent_as_null(self, value):
+        """Test that inf/nan speed and ETA become null, keeping the frame valid JSON."""
+        frame = downloader._sse_progress_event(42.5, 425, 1000, value, value, 'video')
+
+        payload = json.loads(frame[len('data: '):], parse_constant=pytest.fail)
+        assert payload['speed'] is None
+        assert payload['eta'] is None
+
+
+class _FakeYoutubeDL:
+    """Minimal YoutubeDL stand-in that drives progress hooks and writes a file."""
+
+    fail_with = None
+
+    def __init__(self, opts):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def extract_info(self, url, download=True):
+        if self.fail_with is not None:
+            raise self.fail_with
+        for hook in self.opts['progress_hooks']:
+            hook({'status': 'downloading', 'downloaded_bytes': 5, 'total_bytes': 10})
+            hook({'status': 'finished'})
+        output_dir = os.path.dirname(self.opts['outtmpl'])
+        with open(os.path.join(output_dir, 'Test Video.mp4'), 'wb') as f:
+            f.write(b'video content')
+        return {'title': 'Test Video'}
+
+
+class TestDownloadVideoWithProgress:
+    """Test the SSE progress generator."""
+
+    @staticmethod
+    async def _collect(agen):
+        return [json.loads(event[len('data: '):]) async for event in agen]
+
+    @patch('app.services.downloader.yt_dlp.YoutubeDL', _FakeYoutubeDL)
+    @patch('app.services.downloader.tempfile.mkdtemp')
+    async def test_progress_then_complete(self, mock_mkdtemp, temp_download_dir):
+        """Should yield progress events followed by a completion event."""
+        mock_mkdtemp.return_value = temp_download_dir
+
+        events = await self._collect(download_video_with_progress("https://test.com", "best"))
+
+        statuses = [e['status'] for e in events]
+        assert 'downloading' in statuses
+        assert statuses[-1] == 'complete'
+        assert events[-1]['filename'] == 'Test Video.mp4'
+        assert events[-1]['file_size'] == len(b'video content')
+
+        info = remove_completed_download(events[-1]['download_id'])
+        assert info['temp_dir'] == temp_download_dir
+
+    @pytest.mark.parametrize('audio_format, message', [
+        ('mp3', 'Converting to MP3...'),
+        ('opus', 'Converting to OPUS...'),
+        ('best', 'Extracting audio...'),
+    ])
+    @patch('app.services.downloader.tempfile.mkdtemp')
+    async def test_audio_conversion_message_follows_audio_format(self, mock_mkdtemp, temp_download_dir,
+                                                                 audio_format, message):
+        """Should describe the audio postprocessor according to AUDIO_FORMAT."""
+        mock_mkdtemp.return_value = temp_download_dir
+
+        class ConvertingYoutubeDL(_FakeYoutubeDL):
+            def extract_info(self, url, download=True):
+                info = super().extract_info(url, download)
+                for hook in self.opts['postprocessor_hooks']:
+                    hook({'status': 'started', 'postprocessor': 'ExtractAudio'})
+                    hook({'status': 'finished', 'postprocessor': 'ExtractAudio'})
+                return info
+
+        with patch('app.services.downloader.yt_dlp.YoutubeDL', ConvertingYoutubeDL), \
+                patch('app.services.downloader.AUDIO_FORMAT', audio_format):
+            events = await self._collect(
+                download_video_with_progress("https://test.com", "best", audio_only=True)
+            )
+
+        converting = [e for e in events if e['status'] == 'converting']
+        assert converting[0]['message'] == message
+
+    @patch('app.services.downloader.tempfile.mkdtemp')
+    async def test_uses_filepath_reported_by_yt_dlp(self, mock_mkdtemp, temp_download_dir):
+        """Should take the file path from the info dict without scanning the directory."""
+        mock_mkdtemp.return_value = temp_download_dir
+
+        class ReportingYoutubeDL(_FakeYoutubeDL):
+            def extract_info(self, url, download=True):
+                info = super().extract_info(url, download)
+                filepath = os.path.join(temp_download_dir, 'Test Video.mp4')
+                return {**info, 'requested_downloads': [{'filepath': filepath}]}
+
+        with patch('app.services.downloader.yt_dlp.YoutubeDL', ReportingYoutubeDL), \
+                patch.object(downloader, 'find_downloaded_file') as mock_find:
+            events = await self._collect(download_video_with_progress("https://test.com", "best"))
+
+        assert events[-1]['status'] == 'complete'
+        assert events[-1]['filename'] == 'Test Video.mp4'
+        mock_find.assert_not_called()
+        remove_completed_download(events[-1]['download_id'])
+
+    @patch('app.services.downloader.tempfile.mkdtemp')
+    async def test_high_rate_progress_is_coalesced(self, mock_mkdtemp, temp_download_dir):
+        """Should drop rapid progress updates but keep the final one."""
+        mock_mkdtemp.return_value = temp_download_dir
+
+        class ChattyYoutubeDL(_FakeYoutubeDL):
+            def extract_info(self, url, download=True):
+                for hook in self.opts['progress_hooks']:
+                    for downloaded in range(1, 101):
+                        hook({'status': 'downloading', 'downloaded_bytes': downloaded, 'total_bytes': 100})
+                return super().extract_info(url, download)
+
+        with patch('app.services.downloader.yt_dlp.YoutubeDL', ChattyYoutubeDL):
+            events = await self._collect(download_video_with_progress("https://test.com", "best"))
+
+        percents = [e['percent'] for e in events if e['status'] == 'downloading']
+        assert len(percents) < 10
+        assert 100 in percents
+
+    @patch('app.services.downloader.tempfile.mkdtemp')
+    async def test_download_error_yields_error_and_cleans_up(self, mock_mkdtemp, temp_download_dir):
+        """Should report a sanitized error and remove the temp directory."""
+        mock_mkdtemp.return_value = temp_download_dir
+
+        class FailingYoutubeDL(_FakeYoutubeDL):
+            fail_with = Exception("boom")
+
+        with patch('app.services.downloader.yt_dlp.YoutubeDL', FailingYoutubeDL):
+            events = await self._collect(download_video_with_progress("https://test.com", "best"))
+
+        assert events[-1] == {'status': 'error', 'message': 'boom'}
+        assert not os.path.exists(temp_download_dir)
@@ -0,0 +1,54 @@
+"""Tests for path traversal validation in the download routes."""
+
+import os
+
+import pytest
+
+from app.routes.download import _resolve_within_directory
+
+
+class TestResolveWithinDirectory:
+    """Test _resolve_within_directory."""
+
+    def test_file_inside_directory(self, temp_download_dir, create_temp_file):
+        """Should return the resolved path for a file inside the directory."""
+        filepath = create_temp_file("video.mp4")
+        result = _resolve_within_directory(filepath, temp_download_dir)
+        assert result == os.path.realpath(filepath)
+
+    def test_dotdot_escape_rejected(self, temp_download_dir):
+        """Should reject paths that escape via '..'."""
+        escaped = os.path.join(temp_download_dir, "..", "etc", "passwd")
+        assert _resolve_within_directory(escaped, temp_download_dir) is None
+
+    def test_directory_itself_rejected(self, temp_download_dir):
+        """Should reject the directory itself (not a file inside it)."""
+        assert _resolve_within_directory(temp_download_dir, temp_download_dir) is None
+
+    def test_sibling_prefix_rejected(self, temp_download_dir):
+        """Should reject sibling paths sharing a string prefix."""
+        sibling = temp_download_dir + "_other" + os.sep + "video.mp4"
+        assert _resolve_within_directory(sibling, temp_download_dir) is None
+
+    def test_symlink_escape_rejected(self, temp_download_dir, tmp_path):
+        """Should reject symlinks pointing outside the directory."""
+        outside = tmp_path / "secret.txt"
+        outside.write_bytes(b"secret")
+        link = os.path.join(temp_download_dir, "link.mp4")
+        try:
+            os.symlink(outside, link)
+        except (OSError, NotImplementedError):
+            pytest.skip("symlinks not supported")
+        assert _resolve_within_directory(link, temp_download_dir) is None
+
+    def test_symlinked_directory_resolved(self, temp_download_dir, create_temp_file, tmp_path):
+        """Should accept files when the directory is reached through a symlink."""
+        create_temp_file("video.mp4")
+        linked_dir = tmp_path / "linked"
+        try:
+            os.symlink(temp_download_dir, linked_dir)
+        except (OSError, NotImplementedError):
+            pytest.skip("symlinks not supported")
+        filepath = os.path.join(str(linked_dir), "video.mp4")
+        result = _resolve_within_directory(filepath, str(linked_dir))
+        assert result == os.path.realpath(filepath)
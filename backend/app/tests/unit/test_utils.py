@@ -2,9 +2,11 @@
 
 import pytest
 import threading
+from unittest.mock import patch
 
 from app.utils import (
     Metrics,
+    TTLCache,
     calculate_backoff_delay,
     RETRYABLE_EXCEPTIONS,
 )
@@ -95,6 +97,54 @@ class TestMetrics:
         assert stats["errors"] == 0
 
 
+class TestTTLCache:
+    """Test TTLCache expiry and LRU eviction."""
+
+    def test_get_returns_stored_value(self):
+        """Should return values that were set."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("missing") is None
+
+    def test_entries_expire_after_ttl(self):
+        """Should drop entries once their TTL has passed."""
+        cache = TTLCache(maxsize=2, ttl=10)
+        with patch('app.utils.time.monotonic', return_value=100.0):
+            cache.set("a", 1)
+        with patch('app.utils.time.monotonic', return_value=109.0):
+            assert cache.get("a") == 1
+        with patch('app.utils.time.monotonic', return_value=110.0):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        """Should evict the least recently used entry when full."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_pop(self):
+        """Should remove an entry and return its value once."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        assert cache.pop("a") == 1
+        assert cache.pop("a") is None
+        assert cache.get("a") is None
+
+    def test_clear(self):
+        """Should remove all entries."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.clear()
+        assert len(cache) == 0
+
+
 class TestCalculateBackoffDelay:
     """Test exponential backoff delay calculation."""
 
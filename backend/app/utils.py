@@ -3,20 +3,24 @@ Utility functions for metrics collection, logging, and backoff calculation.
 
 This module provides:
 - Metrics: Thread-safe metrics collector for observability
+- TTLCache: Thread-safe LRU cache with per-entry expiry
 - sanitize_for_log: Sanitize user data for safe logging
 - sanitize_error_for_user: Sanitize error messages for user-facing responses
 - calculate_backoff_delay: Exponential backoff calculation
 - RETRYABLE_EXCEPTIONS: Tuple of exceptions that indicate transient errors
 
 Note: The application does NOT use endpoint-level retry logic because yt-dlp
-has internal retries (retries=3 in COMMON_OPTS). The backoff utilities are
+has internal retries with exponential backoff (retries, fragment_retries and
+extractor_retries in COMMON_OPTS). The backoff utilities are
 kept for potential future use and as general-purpose utilities.
 """
 
 import logging
 import re
 import threading
-from typing import Type, Tuple
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Type, Tuple
 
 from .config import RETRY_BASE_DELAY, RETRY_MAX_DELAY, METRICS_ENABLED
 from .exceptions import TransientError
@@ -108,6 +112,65 @@ class Metrics:
 metrics = Metrics()
 
 
+# =============================================================================
+# Caching
+# =============================================================================
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed TTL.
+
+    Expired entries are dropped lazily on lookup; the least recently used
+    entry is evicted when maxsize is exceeded. None cannot be cached (get()
+    returns None on a miss).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (expires_at, value), in least-recently-used order
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove an entry and return its value (None if missing or expired)."""
+        with self._lock:
+            item = self._data.pop(key, None)
+        if item is None:
+            return None
+        expires_at, value = item
+        return value if time.monotonic() < expires_at else None
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
 # =============================================================================
 # Logging Utilities
 # =============================================================================